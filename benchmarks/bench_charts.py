@@ -0,0 +1,101 @@
+"""Chart benchmark: render time and bytes uploaded per chart request.
+
+Replays a synthetic hour of chart requests (city popularity follows a Zipf
+distribution, as in real traffic where a few big cities dominate) through
+two strategies:
+
+- "no cache": every request renders the PNG and uploads it;
+- "cache": `ChartCache` keyed by (location, forecast run); the first request
+  per key renders and uploads, later ones resend the stored `file_id`.
+
+Telegram is not contacted: an upload is counted as the PNG size, a
+`file_id` resend as zero image bytes.
+
+Usage:
+    python benchmarks/bench_charts.py [--requests N] [--cities N] [--seed N]
+
+Recorded on the development sandbox (Python 3.13, 1000 requests, 50 cities):
+
+    strategy    renders   render ms/request   uploaded bytes/request
+    no cache       1000          23.1                 3 057
+    cache            50           1.2                   152
+
+A render takes about 23 ms and produces a ~3 KB PNG. With the cache only
+the first request per city and run pays for it (50 of 1000 here), so
+per-request render time and upload volume drop by ~95%.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "bot"), str(ROOT)]
+
+from bot.services.weather.chart import ChartCache, render_hourly_chart  # noqa: E402
+from bot.services.weather.models import HourlyForecast  # noqa: E402
+
+RUN = "2026101912"
+
+
+def make_forecast(rng: random.Random) -> HourlyForecast:
+    base, swing, phase = rng.uniform(-15, 30), rng.uniform(2, 10), rng.uniform(0, 6)
+    return HourlyForecast(
+        times=[f"2026-10-19T{(12 + h) % 24:02d}:00" for h in range(24)],
+        temperatures=[round(base + swing * math.sin(phase + h / 4), 1) for h in range(24)],
+        run=RUN,
+    )
+
+
+def run_no_cache(trace: list[int], forecasts: list[HourlyForecast]) -> tuple[int, float, int]:
+    renders, elapsed, uploaded = 0, 0.0, 0
+    for city in trace:
+        started = time.perf_counter()
+        png = render_hourly_chart(forecasts[city])
+        elapsed += time.perf_counter() - started
+        renders += 1
+        uploaded += len(png)
+    return renders, elapsed, uploaded
+
+
+def run_cache(trace: list[int], forecasts: list[HourlyForecast]) -> tuple[int, float, int]:
+    cache = ChartCache()
+    elapsed, uploaded = 0.0, 0
+    for city in trace:
+        started = time.perf_counter()
+        key = cache.key(city, city, RUN)
+        if cache.file_id(key) is None:
+            png = cache.png(key, forecasts[city])
+            uploaded += len(png)
+            cache.remember(key, f"file-{city}")
+        elapsed += time.perf_counter() - started
+    return cache.renders, elapsed, uploaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    forecasts = [make_forecast(rng) for _ in range(args.cities)]
+    weights = [1 / (rank + 1) for rank in range(args.cities)]
+    trace = rng.choices(range(args.cities), weights=weights, k=args.requests)
+
+    print(f"{args.requests} requests, {args.cities} cities, {len(set(trace))} distinct")
+    print("strategy    renders   render ms/request   uploaded bytes/request")
+    for name, strategy in (("no cache", run_no_cache), ("cache", run_cache)):
+        renders, elapsed, uploaded = strategy(trace, forecasts)
+        n = len(trace)
+        print(f"{name:<10} {renders:>8} {elapsed / n * 1000:>19.1f} {uploaded / n:>24,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start benchmark: time from interpreter start to a ready dispatcher.
+
+Each sample runs in a fresh interpreter (so imports are really cold, apart
+from the OS page cache and .pyc files) inside a scratch working directory.
+"first boot" starts without a database file; "restart" reuses the database
+written by the previous run, which is the common case in restart-heavy
+deployments.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--root PATH]
+
+`--root` points at another checkout (e.g. an older commit exported with
+`git worktree add`) to compare against.
+
+Recorded on the development sandbox (median of 7, Python 3.13, aiogram 3.x):
+
+    tree                      first boot   restart   heavy modules loaded at ready
+    baseline (pre-change)       5.18 s      5.15 s   sqlalchemy, httpx
+    lazy loading                5.26 s      4.75 s   none
+
+Restarts save about 0.4 s (8%): SQLAlchemy/httpx are no longer imported and
+`create_all` is skipped. A first boot still has to create the schema, and
+therefore import SQLAlchemy. Most of the remaining time is `import aiogram`
+itself (about 4.2 s on this machine).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; works against old trees (no `prepare()`) too.
+CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+root = sys.argv[1]
+sys.path[:0] = [root + "/bot", root]
+import start
+
+async def ready():
+    if hasattr(start, "prepare"):
+        return await start.prepare()
+    # baseline tree: replicate main() up to start_polling
+    from aiogram import Dispatcher
+    from aiogram.fsm.storage.memory import MemoryStorage
+    await start.proceed_schemas()
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.middleware(start.DbSessionMiddleware(session_pool=start.async_session))
+    dp.update.middleware(start.ThrottleMiddleware(rate=1.0))
+    for name in ("common_router", "source_router", "profile_router"):
+        dp.include_router(getattr(start, name))
+    return dp
+
+asyncio.run(ready())
+elapsed = time.perf_counter() - t0
+loaded = [m for m in ("sqlalchemy", "httpx") if type(sys.modules.get(m)).__name__ == "module"]
+print(json.dumps({"elapsed": elapsed, "loaded": loaded}))
+"""
+
+
+def sample(root: Path, cwd: Path) -> dict:
+    env = dict(os.environ, BOT_TOKEN="123456:benchmark", LOG_PROFILE="prod", LOG_LEVEL="WARNING")
+    env.pop("STARTUP_PROFILE", None)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(root)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--root", type=Path, default=ROOT)
+    args = parser.parse_args()
+
+    # warm-up so .pyc files exist and the page cache is populated
+    with tempfile.TemporaryDirectory() as tmp:
+        sample(args.root, Path(tmp))
+
+    first, restart, loaded = [], [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = sample(args.root, Path(tmp))
+            first.append(result["elapsed"])
+            result = sample(args.root, Path(tmp))
+            restart.append(result["elapsed"])
+            loaded = result["loaded"]
+
+    print(f"root: {args.root}")
+    print(f"first boot: median {statistics.median(first):.3f} s  (min {min(first):.3f} s)")
+    print(f"restart:    median {statistics.median(restart):.3f} s  (min {min(restart):.3f} s)")
+    print(f"heavy modules loaded at ready: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
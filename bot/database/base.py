@@ -1,11 +1,16 @@
+from datetime import datetime, timezone
+
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from bot.database.schema import DB_PATH, SCHEMA_VERSION
+from core.logger import JSON_LOGS
+
 # URL для SQLite в асинхронном режиме
-DATABASE_URL = "sqlite+aiosqlite:///./db.sqlite3"
+DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH.as_posix()}"
 
-# Создаем движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Создаем движок (SQL echo only in the dev logging profile)
+engine = create_async_engine(DATABASE_URL, echo=not JSON_LOGS)
 
 # Фабрика сессий
 async_session = async_sessionmaker(engine, expire_on_commit=False)
@@ -27,13 +32,50 @@ class User(Base):
     hobbies: Mapped[str | None] = mapped_column(nullable=True)
 
 
+class GeocodeEntry(Base):
+    """Cached geocoding result keyed by normalised city name.
+
+    Negative results (the upstream knows no such place) are stored with
+    `found=False` so they are not looked up again either.
+    """
+
+    __tablename__ = "geocode_cache"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    found: Mapped[bool]
+    name: Mapped[str | None] = mapped_column(nullable=True)
+    country: Mapped[str | None] = mapped_column(nullable=True)
+    lat: Mapped[float | None] = mapped_column(nullable=True)
+    lon: Mapped[float | None] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+
+
+class UpdateMark(Base):
+    """Highest Telegram `update_id` fully processed, per bot.
+
+    Read and written with the stdlib `sqlite3` module by
+    `bot.database.update_mark`; the model only makes `create_all` create it.
+    """
+
+    __tablename__ = "update_marks"
+
+    bot_id: Mapped[int] = mapped_column(primary_key=True)
+    update_id: Mapped[int]
+    # Unix time of the last write; Telegram may restart the id sequence
+    # after a week without updates, so old marks are ignored
+    updated_at: Mapped[float]
+
+
 
 # Функция для создания таблиц (вызывать при старте бота)
 async def proceed_schemas():
     """Create database tables defined on the SQLAlchemy `Base` metadata.
 
-    This function is intended to be called at application startup to ensure
-    that the SQLite schema exists before the bot starts handling requests.
+    This function is intended to be called at application startup (through
+    `bot.database.schema.ensure_schema`) to ensure that the SQLite schema
+    exists before the bot starts handling requests. It records
+    `SCHEMA_VERSION` so later boots can skip it.
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.exec_driver_sql(f"PRAGMA user_version = {int(SCHEMA_VERSION)}")
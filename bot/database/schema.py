@@ -0,0 +1,34 @@
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+# SQLite file used by the bot (relative to the working directory)
+DB_PATH = Path("./db.sqlite3")
+
+# Bump whenever the models in `bot/database/base.py` change. The value is
+# stored in SQLite's `PRAGMA user_version` after the schema is created.
+SCHEMA_VERSION = 4
+
+
+def stored_schema_version(path: Path = DB_PATH) -> int:
+    """Return the schema version recorded in the database file (0 if none).
+
+    Uses the stdlib `sqlite3` module so the check does not import SQLAlchemy.
+    """
+    if not path.exists():
+        return 0
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+async def ensure_schema() -> bool:
+    """Create the database schema unless the stored version already matches.
+
+    Returns True if `proceed_schemas()` had to run.
+    """
+    if stored_schema_version() == SCHEMA_VERSION:
+        return False
+    from bot.database.base import proceed_schemas
+
+    await proceed_schemas()
+    return True
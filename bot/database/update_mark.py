@@ -0,0 +1,42 @@
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from bot.database.schema import DB_PATH
+
+"""Persistence of the update high-water mark used by `DedupMiddleware`.
+
+Uses the stdlib `sqlite3` module (like `stored_schema_version`) so reading the
+mark at startup and writing it in the background never imports SQLAlchemy.
+The calls are blocking; run them with `asyncio.to_thread`.
+"""
+
+
+def load_update_mark(bot_id: int, path: Path = DB_PATH) -> tuple[int, float] | None:
+    """Return the stored `(update_id, updated_at)` for `bot_id`, or None if none was recorded."""
+    if not path.exists():
+        return None
+    with closing(sqlite3.connect(path)) as conn:
+        try:
+            row = conn.execute(
+                "SELECT update_id, updated_at FROM update_marks WHERE bot_id = ?", (int(bot_id),)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # table not created yet (schema older than the mark)
+            return None
+    return (row[0], row[1]) if row else None
+
+
+def save_update_mark(bot_id: int, update_id: int, path: Path = DB_PATH) -> None:
+    """Store `update_id` as the high-water mark of `bot_id`, stamped with the current time.
+
+    The value is overwritten, not maxed: after Telegram restarts the id
+    sequence the new, lower mark must replace the old one.
+    """
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute(
+            "INSERT INTO update_marks (bot_id, update_id, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(bot_id) DO UPDATE SET update_id = excluded.update_id, updated_at = excluded.updated_at",
+            (int(bot_id), int(update_id), time.time()),
+        )
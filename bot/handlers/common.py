@@ -1,23 +1,33 @@
 import difflib
-import json
-from pathlib import Path
+from html import escape
 
 from aiogram import F, Router
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, CallbackQuery, Message
 
 from bot.keyboards.choice_kb import POPULAR_CITIES, city_keyboard
 from bot.keyboards.keyboard import get_main_menu_keyboard
-from bot.services.weather.get_data import WeatherService, build_weather_message
+from bot.keyboards.weather_kb import HourlyChart, RefreshWeather, refresh_keyboard
 from bot.states.choice_state import ChoiceState
-from bot.utils.get_coords import get_city_coords
+from bot.utils.city_index import get_city_index
+from bot.utils.fsm import clear_state
+from bot.utils.get_coords import load_gazetteer
+from core.lazy import lazy_import
 from core.logger import logger
 
+# Services (httpx, SQLAlchemy for the geocode cache) load on the first weather request
+geocoding = lazy_import("bot.services.geocoding.geocoder")
+weather = lazy_import("bot.services.weather.get_data")
+chart = lazy_import("bot.services.weather.chart")
+
 """Common message handlers for the bot: start, weather flow and quick buttons."""
 
 router = Router()
 
+GEOCODING_UNAVAILABLE = "City search is temporarily unavailable. Please try again later."
+
 
 @router.message(CommandStart())
 @logger.catch
@@ -39,13 +49,27 @@ async def cmd_get_weather(message: Message, state: FSMContext):
     await state.set_state(ChoiceState.choosing_city)
 
 
+def _render_weather(name: str, lat: float, lon: float, report) -> str:
+    """Return the HTML text of a weather reply for a named location."""
+    header = f"<b>📍 {escape(name)}</b> — {lat}, {lon}\n\n"
+    return header + weather.build_weather_message(report)
+
+
+def _record_city(place) -> None:
+    """Make `place` available to inline search and count it towards its ranking."""
+    index = get_city_index()
+    index.add(place.name, place.lat, place.lon)
+    index.record_hit(place.name)
+
+
 @router.message(ChoiceState.choosing_city)
 @logger.catch
 async def process_city(message: Message, state: FSMContext):
     """Process user input when choosing a city.
 
-    The handler performs name lookup (exact and fuzzy), fetches weather via
-    `WeatherService` and returns a formatted message back to the user.
+    The handler resolves the name via `GeocodingService` (gazetteer, SQLite
+    cache, then upstream), suggests fuzzy gazetteer matches when nothing is
+    found, fetches weather via `WeatherService` and replies with the report.
     """
     text = (message.text or "").strip()
     if not text:
@@ -53,7 +77,7 @@ async def process_city(message: Message, state: FSMContext):
         return
 
     if text == "Cancel":
-        await state.clear()
+        await clear_state(state)
         await message.answer("Cancelled.", reply_markup=get_main_menu_keyboard())
         return
 
@@ -61,111 +85,193 @@ async def process_city(message: Message, state: FSMContext):
         await message.answer("Please enter the city name in English (e.g.: London):")
         return
 
-    # try exact lookup
-    coords = get_city_coords(text)
-    city_name = text
-
-    if not coords:
-        # try case-insensitive direct match and fuzzy suggestions
-        coords_file = Path(__file__).resolve().parent.parent / "utils" / "coords.json"
-        try:
-            data = json.loads(coords_file.read_text(encoding="utf-8"))
-            names = list(data.get("coords", {}).keys())
-        except Exception:
-            names = []
+    # gazetteer first, then the cached upstream geocoder
+    try:
+        place = await geocoding.get_geocoding_service().resolve(text)
+    except geocoding.GeocodingError:
+        await message.answer(GEOCODING_UNAVAILABLE)
+        return
 
-        # case-insensitive exact
-        match = next((n for n in names if n.lower() == text.lower()), None)
-        if match:
-            coords = data["coords"][match]
-            city_name = match
+    if place is None:
+        names = [name for name, _ in load_gazetteer().values()]
+        close = difflib.get_close_matches(text, names, n=3, cutoff=0.6)
+        if close:
+            await message.answer(
+                f"City '{text}' not found. Did you mean: {', '.join(close)}?\nPlease enter the exact name or choose from the list.",
+                reply_markup=city_keyboard,
+            )
         else:
-            close = difflib.get_close_matches(text, names, n=3, cutoff=0.6)
-            if close:
-                await message.answer(
-                    f"City '{text}' not found. Did you mean: {', '.join(close)}?\nPlease enter the exact name or choose from the list.",
-                    reply_markup=city_keyboard,
-                )
-                return
-            else:
-                await message.answer(
-                    f"City '{text}' not found. Please try a different name.", reply_markup=city_keyboard
-                )
-                return
-
-    # fetch weather
-    weather_service = WeatherService()
-    lat, lon = coords["lat"], coords["lon"]
-    report = await weather_service.get_weather(lat, lon)
-    await weather_service.close()
+            await message.answer(
+                f"City '{text}' not found. Please try a different name.", reply_markup=city_keyboard
+            )
+        return
+
+    # fetch weather from the user's preferred source (see /choose_source)
+    source = (await state.get_data()).get("source")
+    lat, lon = place.lat, place.lon
+    report = await weather.get_weather_service().get_weather(lat, lon, source=source)
 
     if report:
-        header = f"<b>📍 {city_name}</b> — {lat}, {lon}\n\n"
-        weather_message = build_weather_message(report)
-        await message.answer(header + weather_message, parse_mode="HTML")
+        _record_city(place)
+        await message.answer(
+            _render_weather(place.name, lat, lon, report),
+            parse_mode="HTML",
+            reply_markup=refresh_keyboard(lat, lon, report.stamp, report.digest),
+        )
     else:
         await message.answer("Failed to retrieve weather data.")
 
-    await state.clear()
+    await clear_state(state)
 
 
 @logger.catch
-async def _fetch_and_send_weather(message: Message, city_name: str):
+async def _fetch_and_send_weather(message: Message, city_name: str, source: str | None = None):
     """Helper that looks up coordinates for `city_name` and sends weather.
 
     This is used by quick-button handlers to avoid duplicating fetch logic.
     """
-    coords = get_city_coords(city_name)
-    used_name = city_name
-
-    if not coords:
-        # try case-insensitive lookup
-        coords_file = Path(__file__).resolve().parent.parent / "utils" / "coords.json"
-        try:
-            data = json.loads(coords_file.read_text(encoding="utf-8"))
-            names = list(data.get("coords", {}).keys())
-        except Exception:
-            names = []
-
-        match = next((n for n in names if n.lower() == city_name.lower()), None)
-        if match:
-            coords = data["coords"][match]
-            used_name = match
+    try:
+        place = await geocoding.get_geocoding_service().resolve(city_name)
+    except geocoding.GeocodingError:
+        await message.answer(GEOCODING_UNAVAILABLE)
+        return
 
-    if not coords:
+    if place is None:
         await message.answer("Coordinates for this city were not found.")
         return
 
-    weather_service = WeatherService()
-    lat, lon = coords["lat"], coords["lon"]
-    report = await weather_service.get_weather(lat, lon)
-    await weather_service.close()
+    lat, lon = place.lat, place.lon
+    report = await weather.get_weather_service().get_weather(lat, lon, source=source)
 
     if report:
-        header = f"<b>📍 {used_name}</b> — {lat}, {lon}\n\n"
-        weather_message = build_weather_message(report)
-        await message.answer(header + weather_message, parse_mode="HTML")
+        _record_city(place)
+        await message.answer(
+            _render_weather(place.name, lat, lon, report),
+            parse_mode="HTML",
+            reply_markup=refresh_keyboard(lat, lon, report.stamp, report.digest),
+        )
     else:
         await message.answer("Failed to retrieve weather data.")
 
 
 @router.message(F.text.in_(set(POPULAR_CITIES)))
 @logger.catch
-async def quick_city_click(message: Message):
+async def quick_city_click(message: Message, state: FSMContext):
     """Handle presses of popular city quick-buttons from the main keyboard."""
     text = (message.text or "").strip()
-    await _fetch_and_send_weather(message, text)
+    source = (await state.get_data()).get("source")
+    await _fetch_and_send_weather(message, text, source=source)
+
+
+@router.callback_query(RefreshWeather.filter())
+@logger.catch
+async def refresh_weather(callback: CallbackQuery, callback_data: RefreshWeather, state: FSMContext):
+    """Handle the "Refresh" button under a weather reply.
+
+    The report comes from the shared weather cache (fetched only if the
+    cached entry expired). The message is edited only when the report
+    differs from the one shown, identified by the timestamp and digest in
+    the callback data; otherwise the callback is just acknowledged.
+    """
+    source = (await state.get_data()).get("source")
+    lat, lon = callback_data.lat, callback_data.lon
+    report = await weather.get_weather_service().get_weather(lat, lon, source=source)
+
+    if report is None:
+        await callback.answer("Failed to retrieve weather data.")
+        return
+    if (report.stamp, report.digest) == (callback_data.ts, callback_data.digest):
+        await callback.answer("Already up to date.")
+        return
+    if not isinstance(callback.message, Message):
+        # too old to be edited (InaccessibleMessage) or sent in inline mode
+        await callback.answer("This message can no longer be updated.")
+        return
+
+    # keep the location line of the original reply (it carries the city name)
+    location_line = callback.message.html_text.split("\n", 1)[0]
+    text = location_line + "\n\n" + weather.build_weather_message(report)
+    await callback.message.edit_text(
+        text,
+        parse_mode="HTML",
+        reply_markup=refresh_keyboard(lat, lon, report.stamp, report.digest),
+    )
+    await callback.answer("Updated.")
+
+
+@router.callback_query(HourlyChart.filter())
+@logger.catch
+async def send_hourly_chart(callback: CallbackQuery, callback_data: HourlyChart, state: FSMContext):
+    """Handle the "Chart" button: send the hourly temperature chart as a photo.
+
+    Charts are cached per location, source and forecast run. The first
+    request renders and uploads the PNG; requests arriving during that
+    upload wait for it, and later ones resend the stored Telegram `file_id`,
+    so each chart is rendered and uploaded once.
+    """
+    if not isinstance(callback.message, Message):
+        await callback.answer("This message can no longer be used.")
+        return
+
+    source = (await state.get_data()).get("source")
+    lat, lon = callback_data.lat, callback_data.lon
+    forecast = await weather.get_weather_service().get_hourly(lat, lon, source=source)
+    if forecast is None:
+        await callback.answer("Failed to retrieve the forecast.")
+        return
+
+    message = callback.message
+    cache = chart.get_chart_cache()
+    key = cache.key(lat, lon, forecast.run, forecast.source)
+    caption = f"🌡 Next {len(forecast.temperatures)} hours — {lat}, {lon}"
+    await callback.answer()
+
+    uploaded = False
+
+    async def upload() -> str | None:
+        nonlocal uploaded
+        uploaded = True
+        png = await cache.render(key, forecast)
+        sent = await message.answer_photo(BufferedInputFile(png, filename="chart.png"), caption=caption)
+        if not sent.photo:
+            return None
+        cache.remember(key, sent.photo[-1].file_id)
+        return sent.photo[-1].file_id
+
+    file_id = cache.file_id(key)
+    if file_id is None:
+        try:
+            file_id = await cache.upload_once(key, upload)
+        except Exception:
+            if uploaded:
+                raise
+            # the upload we waited for failed; try our own below
+            file_id = None
+        if uploaded:
+            return
+
+    if file_id is not None:
+        try:
+            await message.answer_photo(file_id, caption=caption)
+            return
+        except TelegramBadRequest as e:
+            logger.warning("Cached chart file_id rejected, uploading again: {}", e)
+            cache.forget(key)
+
+    await upload()
 
 
 @router.message(F.text == "Cancel")
 @logger.catch
 async def cancel_any(message: Message, state: FSMContext):
     """Handle 'Cancel' from any state: clear FSM and show main menu."""
-    await state.clear()
+    await clear_state(state)
     await message.answer("Cancelled.", reply_markup=get_main_menu_keyboard())
 
 
 @router.message(Command("help"))
 async def cmd_help(message: Message):
     """Show a short help text listing available commands."""
-    await message.answer("Commands:\n/start - start conversation\n/help - show this message")
+    await message.answer(
+        "Commands:\n/start - start conversation\n/choose_source - pick a weather data source\n/help - show this message"
+    )
@@ -0,0 +1,121 @@
+from html import escape
+from os import getenv
+
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from bot.utils.debug_stats import (
+    debug_snapshot,
+    start_tracemalloc,
+    stop_tracemalloc,
+    tracemalloc_top,
+)
+from core.logger import logger
+
+"""Admin-only runtime introspection: `/debug_stats`."""
+
+
+def _parse_admin_ids(value: str) -> frozenset[int]:
+    """Parse a comma-separated list of Telegram user ids.
+
+    Invalid entries are logged and skipped so a typo in the environment
+    disables debug access for that entry instead of stopping the bot.
+    """
+    ids = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.add(int(part))
+        except ValueError:
+            logger.warning("Ignoring invalid ADMIN_IDS entry {!r}", part)
+    return frozenset(ids)
+
+
+# Telegram user ids allowed to use debug commands
+ADMIN_IDS = _parse_admin_ids(getenv("ADMIN_IDS", ""))
+
+router = Router()
+# Everyone else gets no answer at all, as if the command did not exist
+router.message.filter(F.from_user.id.in_(ADMIN_IDS))
+
+USAGE = "Usage: /debug_stats [mem [N] | mem off]"
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _format_ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3g}"
+    return "-" if value is None else str(value)
+
+
+def _format_metrics(values: dict, indent: str) -> list[str]:
+    """Render nested metric mappings: flat values on one line, sub-mappings indented."""
+    flat = ", ".join(f"{k}={_format_value(v)}" for k, v in values.items() if not isinstance(v, dict))
+    lines = [indent + flat] if flat else []
+    for key, value in values.items():
+        if isinstance(value, dict):
+            lines.append(f"{indent}{key}:")
+            lines.extend(_format_metrics(value, indent + "  "))
+    return lines
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """Render a `debug_snapshot()` result as plain text."""
+    lines = ["Stores (entries, est. size):"]
+    for name, info in snapshot["stores"].items():
+        if "error" in info:
+            lines.append(f"  {name}: {info['error']}")
+        else:
+            lines.append(f"  {name}: {info['entries']}, {_format_bytes(info['bytes'])}")
+    for name, values in snapshot["metrics"].items():
+        lines.append(f"{name}:")
+        lines.extend(_format_metrics(values, "  "))
+    lag = snapshot["loop_lag"]
+    lines.append(
+        "Loop lag: last {}, p50 {}, p95 {}, max {}".format(
+            *(_format_ms(lag[k]) for k in ("last", "p50", "p95", "max"))
+        )
+    )
+    return "\n".join(lines)
+
+
+@router.message(Command("debug_stats"))
+@logger.catch
+async def cmd_debug_stats(message: Message, command: CommandObject):
+    """Report cache sizes and loop lag; `mem` manages tracemalloc snapshots.
+
+    `/debug_stats mem` starts tracing on first use and afterwards lists the
+    top allocation sites (`mem 20` for more lines); `mem off` stops tracing.
+    """
+    args = (command.args or "").split()
+    if not args:
+        text = format_snapshot(debug_snapshot())
+    elif args[0] == "mem" and args[1:] == ["off"]:
+        stop_tracemalloc()
+        text = "tracemalloc stopped."
+    elif args[0] == "mem" and (len(args) == 1 or (len(args) == 2 and args[1].isdigit())):
+        if start_tracemalloc():
+            text = "tracemalloc started; run the command again later for a snapshot."
+        else:
+            top = tracemalloc_top(int(args[1]) if len(args) == 2 else 10)
+            text = "Top allocations since tracing started:\n" + "\n".join(top or ["(none)"])
+    else:
+        await message.answer(USAGE)
+        return
+
+    # stay within Telegram's 4096-character message limit
+    await message.answer(f"<pre>{escape(text[:3900])}</pre>", parse_mode="HTML")
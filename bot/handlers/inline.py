@@ -0,0 +1,110 @@
+import asyncio
+from html import escape
+
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from bot.utils.city_index import get_city_index
+from bot.utils.debug_stats import register_store
+from core.lazy import lazy_import
+from core.logger import logger
+
+"""Inline mode: `@bot Lon` autocompletes city names with current weather."""
+
+weather = lazy_import("bot.services.weather.get_data")
+
+router = Router()
+
+# Results shown per query
+MAX_RESULTS = 5
+# Upstream fetches a single inline query may start; the rest use the cache only
+MAX_INLINE_FETCHES = 2
+# How long a query waits for those fetches before answering with what it has
+FETCH_TIMEOUT = 1.5
+# Telegram-side caching of an answer: full answers live as long as the weather
+# cache entry, partial ones (some cities without weather yet) are retried soon
+CACHE_TIME_FULL = 60
+CACHE_TIME_PARTIAL = 5
+
+# Pre-rendered articles: city name -> (report time, article)
+_articles: dict[str, tuple[str | None, InlineQueryResultArticle]] = {}
+# Running answers, and fetches that outlive their query and keep warming the
+# cache for the next keystroke
+_background: set[asyncio.Task] = set()
+
+register_store("inline.articles", lambda: _articles)
+
+
+def _article(name: str, lat: float, lon: float, report) -> InlineQueryResultArticle:
+    """Return the article for `name`, rendering it only when the report changed."""
+    stamp = report.time if report is not None else None
+    cached = _articles.get(name)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    header = f"<b>📍 {escape(name)}</b> — {lat}, {lon}\n\n"
+    if report is not None:
+        text = header + weather.build_weather_message(report)
+        description = f"{report.temperature}°C, {report.condition}"
+    else:
+        text = header + "Weather data is not available right now."
+        description = "Weather is loading…"
+    article = InlineQueryResultArticle(
+        id=f"city:{name}"[:64],
+        title=name,
+        description=description,
+        input_message_content=InputTextMessageContent(message_text=text, parse_mode="HTML"),
+    )
+    _articles[name] = (stamp, article)
+    return article
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+@router.inline_query()
+async def inline_city_search(query: InlineQuery):
+    """Answer an inline query with matching cities and their current weather.
+
+    Inline queries run under the user's private-chat key in `ChatScheduler`,
+    but they never touch FSM state, so nothing needs them ordered. The answer
+    (which may wait for weather fetches) is therefore built in a background
+    task and the handler returns at once: the next keystroke and the user's
+    private messages are not queued behind it.
+    """
+    _spawn(_answer(query))
+
+
+@logger.catch
+async def _answer(query: InlineQuery) -> None:
+    """Build and send the answer to `query`.
+
+    Matches come from the prefix index; weather is read from the shared
+    `WeatherService` cache and at most `MAX_INLINE_FETCHES` missing entries
+    are fetched per query, waiting up to `FETCH_TIMEOUT` for them.
+    """
+    index = get_city_index()
+    names = index.search(query.query, MAX_RESULTS)
+    service = weather.get_weather_service()
+
+    coords = {name: index.coords(name) for name in names}
+    reports = {name: service.peek(*coords[name]) for name in names}
+    missing = [name for name in names if reports[name] is None][:MAX_INLINE_FETCHES]
+    if missing:
+        tasks = {_spawn(service.get_weather(*coords[name])): name for name in missing}
+        done, _ = await asyncio.wait(tasks, timeout=FETCH_TIMEOUT)
+        for task in done:
+            if not task.cancelled() and task.exception() is None:
+                reports[tasks[task]] = task.result()
+
+    results = [_article(name, *coords[name], reports[name]) for name in names]
+    complete = all(report is not None for report in reports.values())
+    await query.answer(
+        results,
+        cache_time=CACHE_TIME_FULL if complete else CACHE_TIME_PARTIAL,
+        is_personal=False,
+    )
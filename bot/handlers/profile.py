@@ -1,19 +1,34 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from keyboards.inline_profile import edit_profile_keyboard
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 from states.profile_state import ProfileState
 
-from bot.database.base import User
+from bot.utils.fsm import clear_state
+from core.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# SQLAlchemy and the models load on the first profile update, not at startup
+sa = lazy_import("sqlalchemy")
+db = lazy_import("bot.database.base")
 
 router = Router()
 
+
+async def _get_user(session: AsyncSession, tg_id: int):
+    result = await session.execute(sa.select(db.User).where(db.User.tg_id == tg_id))
+    return result.scalar_one_or_none()
+
+
 @router.message(F.text.in_(set(("Profile", "  Profile"))))
 async def profile_entry(message: Message, state: FSMContext, session: AsyncSession):
-    result = await session.execute(select(User).where(User.tg_id == message.from_user.id))
-    user = result.scalar_one_or_none()
+    user = await _get_user(session, message.from_user.id)
     if user:
         await message.answer(
             f"📋 Your profile\n"
@@ -29,8 +44,7 @@ async def profile_entry(message: Message, state: FSMContext, session: AsyncSessi
 
 @router.callback_query(F.data == "edit_profile")
 async def edit_profile(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
-    result = await session.execute(select(User).where(User.tg_id == callback.from_user.id))
-    user = result.scalar_one_or_none()
+    user = await _get_user(session, callback.from_user.id)
     if not user:
         await callback.message.answer("You don't have a profile yet. Use the Profile button to create one.")
         await callback.answer()
@@ -75,10 +89,9 @@ async def process_age(message: Message, state: FSMContext, session: AsyncSession
         return
     await state.update_data(age=age)
     data = await state.get_data()
-    result = await session.execute(select(User).where(User.tg_id == message.from_user.id))
-    user = result.scalar_one_or_none()
+    user = await _get_user(session, message.from_user.id)
     if user is None:
-        user = User(tg_id=message.from_user.id)
+        user = db.User(tg_id=message.from_user.id)
         session.add(user)
     user.username = data.get("name")
     user.city = data.get("city")
@@ -92,9 +105,9 @@ async def process_age(message: Message, state: FSMContext, session: AsyncSession
         f"Hobbies: {user.hobbies}\n"
         f"Age: {user.age}"
     )
-    await state.clear()
+    await clear_state(state)
 
 @router.message(F.text == "Cancel")
 async def cancel_profile(message: Message, state: FSMContext):
-    await state.clear()
+    await clear_state(state)
     await message.answer("Profile setup cancelled.")
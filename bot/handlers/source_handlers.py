@@ -6,8 +6,12 @@ from aiogram.types import Message
 from bot.keyboards.keyboard import get_main_menu_keyboard
 from bot.keyboards.source_kb import source_keyboard
 from bot.states.choice_state import ChoiceState
+from bot.utils.fsm import clear_state
+from core.lazy import lazy_import
 from core.logger import logger
 
+weather = lazy_import("bot.services.weather.get_data")
+
 router = Router()
 
 
@@ -28,14 +32,21 @@ async def choose_source(message: Message, state: FSMContext):
     """Handle the user's choice of weather source and persist it in FSM data.
 
     If the user selects 'Cancel' the flow is aborted and the main menu is shown.
+    The stored provider name is used by weather requests while that provider
+    is healthy; otherwise the router falls back to another one.
     """
-    text = message.text
+    text = message.text or ""
     if text == "Cancel":
         await message.answer("Cancelled", reply_markup=get_main_menu_keyboard())
-        await state.clear()
+        await clear_state(state)
+        return
+
+    provider = weather.get_weather_service().router.find(text)
+    if provider is None:
+        await message.answer("Unknown source. Please choose one from the list.", reply_markup=source_keyboard)
         return
 
-    # Save selected source into FSM data
-    await state.update_data(source=text)
-    await message.answer(f"Source selected: {text}", reply_markup=get_main_menu_keyboard())
-    await state.clear()
+    # Save selected source into FSM data (kept by `clear_state`)
+    await state.update_data(source=provider.name)
+    await message.answer(f"Source selected: {provider.title}", reply_markup=get_main_menu_keyboard())
+    await clear_state(state)
@@ -4,12 +4,12 @@ from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 def make_source_keyboard() -> ReplyKeyboardMarkup:
     """Return a simple keyboard allowing the user to pick a weather source.
 
-    Currently this contains a placeholder option and a 'Cancel' action.
+    Button texts are matched against provider names by `ProviderRouter.find`.
     """
     kb = ReplyKeyboardMarkup(
         keyboard=[
             [KeyboardButton(text="Open-Meteo")],
-            [KeyboardButton(text="Other (placeholder)")],
+            [KeyboardButton(text="MET Norway")],
             [KeyboardButton(text="Cancel")],
         ],
         resize_keyboard=True,
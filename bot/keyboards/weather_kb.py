@@ -0,0 +1,38 @@
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+class RefreshWeather(CallbackData, prefix="wr"):
+    """Callback data of the "Refresh" button under a weather reply.
+
+    Carries the location key (coordinates rounded to 4 decimals) and the
+    shown report's timestamp and digest, so the handler can tell whether the
+    report changed without storing anything per message.
+    """
+
+    lat: float
+    lon: float
+    ts: int
+    digest: str
+
+
+class HourlyChart(CallbackData, prefix="wc"):
+    """Callback data of the "Chart" button: the location key of the reply."""
+
+    lat: float
+    lon: float
+
+
+def refresh_keyboard(lat: float, lon: float, ts: int, digest: str) -> InlineKeyboardMarkup:
+    """Return the inline keyboard of a weather reply: "Refresh" and "Chart" buttons."""
+    lat, lon = round(lat, 4), round(lon, 4)
+    data = RefreshWeather(lat=lat, lon=lon, ts=ts, digest=digest)
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🔄 Refresh", callback_data=data.pack()),
+                InlineKeyboardButton(text="📈 Chart", callback_data=HourlyChart(lat=lat, lon=lon).pack()),
+            ],
+        ]
+    )
+    return kb
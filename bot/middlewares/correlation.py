@@ -0,0 +1,30 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from core.logger import logger
+
+
+class CorrelationMiddleware(BaseMiddleware):
+    """Middleware that binds a per-update correlation id to all log records.
+
+    The Telegram `update_id` is stored in a context variable (via
+    `logger.contextualize`) for the lifetime of the handler call, so log lines
+    emitted by concurrently processed updates can be told apart. It should be
+    registered before any other update middleware.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Run `handler` with the update's correlation id bound to the logger."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        with logger.contextualize(update_id=event.update_id):
+            return await handler(event, data)
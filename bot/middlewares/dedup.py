@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, Update
+
+from bot.database.update_mark import load_update_mark, save_update_mark
+from core.logger import LogSampler, logger
+
+# Redelivery after a restart arrives as a burst of duplicates; sample the notices.
+_dedup_log = LogSampler(interval=5.0, burst=3)
+
+# Telegram picks a new random update_id sequence after a week without
+# updates; marks older than this are not trusted
+MARK_MAX_AGE = 6 * 24 * 3600
+
+
+class RecentIds:
+    """Fixed-size set of the most recently added ids.
+
+    A ring buffer remembers insertion order and a set answers membership in
+    O(1); adding to a full buffer evicts the oldest id. Memory is bounded by
+    `capacity` no matter how many ids pass through.
+    """
+
+    __slots__ = ("capacity", "_ring", "_pos", "_ids")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self._ring: list[int | None] = [None] * self.capacity
+        self._pos = 0
+        self._ids: set[int] = set()
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __sizeof__(self) -> int:
+        # the ring and the set are allocated once and never grow past `capacity`
+        return object.__sizeof__(self) + sys.getsizeof(self._ring) + sys.getsizeof(self._ids)
+
+    def add(self, item: int) -> bool:
+        """Add `item`; return False if it was already present."""
+        if item in self._ids:
+            return False
+        evicted = self._ring[self._pos]
+        if evicted is not None:
+            self._ids.discard(evicted)
+        self._ring[self._pos] = item
+        self._ids.add(item)
+        self._pos = (self._pos + 1) % self.capacity
+        return True
+
+
+class DedupMiddleware(BaseMiddleware):
+    """Drop updates whose `update_id` was already processed.
+
+    Telegram redelivers updates after restarts and webhook retries; without
+    this every duplicate would rerun its handler (refetching weather, sending
+    the reply again, repeating profile writes). Register it right after
+    `CorrelationMiddleware` so duplicates never open a DB session or count
+    against the throttle.
+
+    Two checks run per update, both O(1):
+
+    - the last `capacity` update ids seen by this process (`RecentIds`),
+      which catches redelivery while the bot is running;
+    - with `persist=True`, the high-water mark stored in SQLite per bot id:
+      ids in the window `(floor - capacity, floor]` below the highest id
+      processed before the last shutdown are dropped.
+
+    Only that window is skipped because Telegram restarts the id sequence at
+    a random value after a week without updates: an id far below the mark
+    means the sequence was reset, so the floor (and the in-memory mark) are
+    cleared instead of dropping all new traffic. Marks older than
+    `MARK_MAX_AGE` are ignored at startup for the same reason, and keying
+    them by bot id keeps a database shared with another token harmless.
+
+    The mark is the highest id whose handler *finished*. It is written in
+    the background within `flush_interval` seconds of changing (at most one
+    write per interval) and once more on shutdown, so after a crash at most
+    that window of updates is processed twice. Updates that were still
+    running at a crash but have lower ids than a finished one are not retried.
+    """
+
+    def __init__(self, capacity: int = 4096, persist: bool = False, flush_interval: float = 5.0) -> None:
+        """Create the middleware.
+
+        Args:
+            capacity: Number of recent update ids remembered in memory.
+            persist: Whether to load and store the high-water mark in SQLite.
+            flush_interval: Minimum seconds between high-water mark writes.
+        """
+        super().__init__()
+        self.recent = RecentIds(capacity)
+        self.persist = persist
+        self.flush_interval = float(flush_interval)
+        self.bot_id: int | None = None
+        # ids at or just below this were processed before the last restart
+        self.floor = 0
+        # highest id whose handler finished, and the value last written
+        self.mark = 0
+        self._saved = 0
+        self._last_flush = 0.0
+        self._flushing: asyncio.Task | None = None
+        self.dropped = 0
+
+    async def startup(self, bot: Bot) -> None:
+        """Load `bot`'s persisted high-water mark (register on `dp.startup`)."""
+        if not self.persist:
+            return
+        self.bot_id = bot.id
+        stored = await asyncio.to_thread(load_update_mark, self.bot_id)
+        if stored is None:
+            return
+        update_id, updated_at = stored
+        if time.time() - updated_at > MARK_MAX_AGE:
+            logger.info("Ignoring update mark {} from {:.0f}s ago", update_id, time.time() - updated_at)
+            return
+        self.floor = self.mark = self._saved = update_id
+        logger.info("Skipping already processed updates up to id {}", self.floor)
+
+    async def shutdown(self) -> None:
+        """Write the final high-water mark (register on `dp.shutdown`)."""
+        if self._flushing is not None and not self._flushing.done():
+            self._flushing.cancel()
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self._flush()
+
+    def stats(self) -> dict[str, int | None]:
+        """Return the filter's size, high-water marks and the number of dropped updates."""
+        return {
+            "recent": len(self.recent),
+            "capacity": self.recent.capacity,
+            "bot_id": self.bot_id,
+            "floor": self.floor,
+            "mark": self.mark,
+            "dropped": self.dropped,
+        }
+
+    async def _flush(self) -> None:
+        mark = self.mark
+        if not self.persist or self.bot_id is None or mark == self._saved:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            await asyncio.to_thread(save_update_mark, self.bot_id, mark)
+        except Exception:
+            logger.exception("Failed to store the update high-water mark")
+            return
+        self._saved = mark
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(max(0.0, self._last_flush + self.flush_interval - time.monotonic()))
+        await self._flush()
+
+    def _schedule_flush(self) -> None:
+        # one pending write at a time; it picks up the latest mark when it runs
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.ensure_future(self._flush_later())
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Call `handler` unless the update was seen before."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        update_id = event.update_id
+        reference = max(self.floor, self.mark)
+        if reference and update_id <= reference - self.recent.capacity:
+            # Far below anything recent: Telegram started a new id sequence
+            logger.warning("Update id {} is far below mark {}; assuming a new id sequence", update_id, reference)
+            self.floor = self.mark = 0
+
+        if self.floor - self.recent.capacity < update_id <= self.floor or not self.recent.add(update_id):
+            self.dropped += 1
+            _dedup_log.log("duplicate", "INFO", "Dropped duplicate update {}", update_id)
+            return None
+
+        try:
+            return await handler(event, data)
+        finally:
+            if update_id > self.mark:
+                self.mark = update_id
+                if self.persist:
+                    self._schedule_flush()
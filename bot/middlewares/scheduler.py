@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Mapping
+from contextlib import asynccontextmanager
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+from bot.services.weather.health import LatencyTracker
+from core.logger import LogSampler
+
+_wait_log = LogSampler(interval=10.0)
+
+
+class _ChatQueue:
+    __slots__ = ("running", "waiters")
+
+    def __init__(self) -> None:
+        self.running = False
+        self.waiters: deque[asyncio.Future] = deque()
+
+
+class ChatScheduler(BaseEventIsolation):
+    """Per-chat ordered, cross-chat parallel update scheduling.
+
+    Plugged into the dispatcher as its FSM `events_isolation`, so it wraps
+    each update *before* the FSM state is read: updates with the same FSM key
+    (user in chat) run strictly one after another in arrival order, while
+    different chats run concurrently up to `max_concurrency` handlers in
+    total. A chat's queue is dropped as soon as it is idle, so memory only
+    grows with the number of chats that currently have work.
+
+    Inline queries have no chat and share the private-chat key of their
+    user. They need no ordering (they never touch FSM state), so the inline
+    handler only starts its work under the lock and answers from a
+    background task; a slow answer does not hold up the next keystroke or
+    the user's private messages.
+    """
+
+    def __init__(self, max_concurrency: int = 64, slow_wait: float = 2.0) -> None:
+        """Create the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of updates processed at once.
+            slow_wait: Queue waits longer than this (seconds) are logged.
+        """
+        self.max_concurrency = int(max_concurrency)
+        self.slow_wait = float(slow_wait)
+        self._queues: dict[StorageKey, _ChatQueue] = {}
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._running = 0
+        self.wait_times = LatencyTracker(window=1000)
+
+    @property
+    def queues(self) -> Mapping[StorageKey, _ChatQueue]:
+        """Queues of the chats that currently have work."""
+        return self._queues
+
+    def stats(self) -> dict[str, float | None]:
+        """Return queue sizes and queue-wait figures (seconds) as a metrics mapping."""
+        return {
+            "active_chats": len(self._queues),
+            "waiting": sum(len(q.waiters) for q in self._queues.values()),
+            "running": self._running,
+            "wait_p50": self.wait_times.percentile(50),
+            "wait_p95": self.wait_times.p95(),
+            "wait_max": self.wait_times.percentile(100),
+        }
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        started = time.monotonic()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _ChatQueue()
+
+        if queue.running:
+            waiter = asyncio.get_running_loop().create_future()
+            queue.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Our turn came just as we were cancelled: pass it on.
+                    self._release(key, queue)
+                else:
+                    queue.waiters.remove(waiter)
+                raise
+        else:
+            queue.running = True
+
+        try:
+            async with self._global:
+                waited = time.monotonic() - started
+                self.wait_times.record(waited)
+                if waited > self.slow_wait:
+                    _wait_log.log("slow", "WARNING", "Update waited {:.2f}s in the chat queue", waited)
+                self._running += 1
+                try:
+                    yield
+                finally:
+                    self._running -= 1
+        finally:
+            self._release(key, queue)
+
+    def _release(self, key: StorageKey, queue: _ChatQueue) -> None:
+        # Hand the chat over to the next waiting update, if any.
+        while queue.waiters:
+            waiter = queue.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        queue.running = False
+        if self._queues.get(key) is queue:
+            del self._queues[key]
+
+    async def close(self) -> None:
+        self._queues.clear()
+
+
+_scheduler: ChatScheduler | None = None
+
+
+def get_scheduler() -> ChatScheduler:
+    """Return the process-wide scheduler used by the dispatcher."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ChatScheduler()
+    return _scheduler
@@ -1,21 +1,61 @@
+from __future__ import annotations
+
+import weakref
 from collections.abc import Awaitable, Callable
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class LazySession:
+    """Stand-in for an `AsyncSession` that opens the real one on first use.
+
+    Attribute access is forwarded to the session, so handlers use it exactly
+    like an `AsyncSession`. Updates whose handlers never touch the database
+    therefore neither open a session nor import SQLAlchemy.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession]) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    async def aclose(self) -> None:
+        """Close the underlying session if it was ever opened."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
 
 class DbSessionMiddleware(BaseMiddleware):
     """Middleware that provides an async SQLAlchemy session for each update.
 
     Injects a session into the handler `data` mapping under the key `'session'`.
-    The session is created from the provided `async_sessionmaker` and is
-    closed automatically when the handler completes.
+    `session_pool` is any callable returning an `AsyncSession` (usually an
+    `async_sessionmaker`); it is only called when the handler first uses the
+    session, which is then closed automatically when the handler completes.
     """
-    def __init__(self, session_pool: async_sessionmaker):
+    def __init__(self, session_pool: Callable[[], AsyncSession]):
         super().__init__()
         self.session_pool = session_pool
+        # sessions of the updates currently being handled
+        self.sessions: weakref.WeakSet[LazySession] = weakref.WeakSet()
+
+    def identity_map_objects(self) -> list[Any]:
+        """Return the ORM objects held in the identity maps of all open sessions."""
+        return [obj for s in list(self.sessions) if s.opened for obj in s.identity_map.values()]
 
     async def __call__(
         self,
@@ -23,11 +63,16 @@ class DbSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        """Open a session, add it to `data`, and call the handler.
+        """Add a lazily opened session to `data`, and call the handler.
 
         The session is available to handlers via the `data` dict and will be
-        committed/closed by the context manager when the handler returns.
+        closed when the handler returns.
         """
-        async with self.session_pool() as session:
-            data["session"] = session
+        session = LazySession(self.session_pool)
+        data["session"] = session
+        self.sessions.add(session)
+        try:
             return await handler(event, data)
+        finally:
+            self.sessions.discard(session)
+            await session.aclose()
@@ -1,11 +1,14 @@
 import time
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Mapping
 from typing import Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject, Update
 
-from core.logger import logger
+from core.logger import LogSampler, logger
+
+# Throttle notices repeat for every dropped update; keep at most one per second.
+_throttle_log = LogSampler(interval=1.0)
 
 
 class ThrottleMiddleware(BaseMiddleware):
@@ -25,6 +28,11 @@ class ThrottleMiddleware(BaseMiddleware):
         self.rate = float(rate)
         self._last: dict[int, float] = {}
 
+    @property
+    def last_seen(self) -> Mapping[int, float]:
+        """Last request time (monotonic) per user id; grows with every user seen."""
+        return self._last
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -79,7 +87,9 @@ class ThrottleMiddleware(BaseMiddleware):
             last = self._last.get(user_id)
             if last is not None and (now - last) < self.rate:
                 # Too fast — ignore and optionally inform user
-                logger.info("Throttled user {user} — {dt:.3f}s since last", user=user_id, dt=(now - last))
+                _throttle_log.log(
+                    "throttle", "INFO", "Throttled user {user} — {dt:.3f}s since last", user=user_id, dt=(now - last)
+                )
                 if reply_coro is not None:
                     try:
                         await reply_coro("Please avoid spamming — try again in a few seconds.")
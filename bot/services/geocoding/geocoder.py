@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+import httpx
+from pydantic import BaseModel
+
+from bot.services.weather.limiter import AdaptiveLimiter, LimiterTimeout, get_limiter, limited_get
+from bot.utils.get_coords import load_gazetteer, normalize_city_name
+from core.lazy import lazy_import
+from core.logger import LogSampler, logger
+from core.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# SQLAlchemy is only needed once a name misses the gazetteer
+sa = lazy_import("sqlalchemy")
+db = lazy_import("bot.database.base")
+
+_geocode_log = LogSampler(interval=5.0, burst=3)
+
+
+class Place(BaseModel):
+    name: str
+    lat: float
+    lon: float
+    country: str | None = None
+
+
+class GeocodingError(Exception):
+    """Raised when the upstream could not answer (as opposed to "not found")."""
+
+
+class GeocodingBackend(ABC):
+    """Upstream place-name search used for cities missing from the gazetteer.
+
+    `search` returns `None` only when the upstream positively knows no such
+    place; transient problems must raise `GeocodingError` so that they are
+    not cached as negative results.
+    """
+
+    @abstractmethod
+    async def search(self, name: str) -> Place | None:
+        """Look up `name` and return the best match."""
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class OpenMeteoGeocoder(GeocodingBackend):
+    """Place search using the Open-Meteo geocoding API."""
+
+    BASE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        client: httpx.AsyncClient | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        queue_timeout: float = 2.0,
+    ) -> None:
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self.limiter = limiter or get_limiter("open-meteo-geocoding")
+        self.queue_timeout = float(queue_timeout)
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client connection pool."""
+        await self._client.aclose()
+
+    async def search(self, name: str) -> Place | None:
+        params = {"name": name, "count": 1, "language": "en", "format": "json"}
+        try:
+            response = await limited_get(self._client, self.limiter, self.BASE_URL, self.queue_timeout, params=params)
+            results = response.json().get("results") or []
+        except LimiterTimeout as e:
+            raise GeocodingError(str(e)) from e
+        except (httpx.HTTPError, ValueError) as e:
+            raise GeocodingError(f"geocoding request failed: {e!r}") from e
+
+        if not results:
+            return None
+        best = results[0]
+        return Place(
+            name=best.get("name") or name,
+            lat=best["latitude"],
+            lon=best["longitude"],
+            country=best.get("country"),
+        )
+
+
+class GeocodingService:
+    """Resolve city names to coordinates.
+
+    Lookup order:
+    1. the local gazetteer (`bot/utils/coords.json`)
+    2. the persistent `geocode_cache` SQLite table (positive and negative)
+    3. the upstream `GeocodingBackend`, whose answer is then cached
+
+    Names are normalised with `normalize_city_name`, and concurrent lookups of
+    the same name share one upstream request, so each distinct name costs at
+    most one upstream call.
+    """
+
+    def __init__(
+        self,
+        backend: GeocodingBackend | None = None,
+        session_pool: async_sessionmaker | None = None,
+    ) -> None:
+        self.backend = backend or OpenMeteoGeocoder()
+        self._session_pool = session_pool
+        self._inflight = SingleFlight()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    @staticmethod
+    def lookup_local(name: str) -> Place | None:
+        """Return the gazetteer entry for `name`, if any (no I/O after first load)."""
+        entry = load_gazetteer().get(normalize_city_name(name))
+        if entry is None:
+            return None
+        canonical, coords = entry
+        return Place(name=canonical, lat=coords["lat"], lon=coords["lon"])
+
+    @property
+    def session_pool(self) -> async_sessionmaker:
+        if self._session_pool is None:
+            self._session_pool = db.async_session
+        return self._session_pool
+
+    async def _load_cached(self, key: str) -> tuple[bool, Place | None]:
+        async with self.session_pool() as session:
+            entry = await session.get(db.GeocodeEntry, key)
+        if entry is None:
+            return False, None
+        if not entry.found:
+            return True, None
+        return True, Place(name=entry.name, lat=entry.lat, lon=entry.lon, country=entry.country)
+
+    async def _store(self, key: str, place: Place | None) -> None:
+        entry = db.GeocodeEntry(key=key, found=place is not None)
+        if place is not None:
+            entry.name, entry.lat, entry.lon, entry.country = place.name, place.lat, place.lon, place.country
+        async with self.session_pool() as session:
+            await session.merge(entry)
+            await session.commit()
+
+    async def _resolve_remote(self, key: str, query: str) -> Place | None:
+        # The cache only saves upstream calls: a broken or locked database
+        # must not turn into "not found", so read errors count as a miss and
+        # write errors only cost a later repeat lookup.
+        try:
+            hit, place = await self._load_cached(key)
+        except sa.exc.SQLAlchemyError as e:
+            _geocode_log.log("cache_read", "WARNING", "Geocode cache read failed for {!r}: {!r}", key, e)
+            hit = False
+        if hit:
+            return place
+        try:
+            place = await self.backend.search(query)
+        except GeocodingError as e:
+            _geocode_log.log("upstream", "WARNING", "Geocoding failed for {!r}: {}", query, e)
+            raise
+        try:
+            await self._store(key, place)
+        except sa.exc.SQLAlchemyError as e:
+            _geocode_log.log("cache_write", "WARNING", "Geocode cache write failed for {!r}: {!r}", key, e)
+        return place
+
+    async def resolve(self, name: str) -> Place | None:
+        """Return the `Place` for `name`, or None if no such place is known.
+
+        Raises `GeocodingError` if the name had to be looked up upstream and
+        the upstream could not answer, or the lookup failed unexpectedly, so
+        callers can ask the user to retry instead of reporting the city as
+        unknown.
+        """
+        key = normalize_city_name(name)
+        if not key:
+            return None
+        local = self.lookup_local(key)
+        if local is not None:
+            return local
+
+        try:
+            return await self._inflight.do(key, lambda: self._resolve_remote(key, " ".join(name.split())))
+        except GeocodingError:
+            raise
+        except Exception as e:
+            logger.exception("Geocoding {!r} failed unexpectedly", name)
+            raise GeocodingError(f"unexpected error: {e!r}") from e
+
+_service: GeocodingService | None = None
+
+
+def get_geocoding_service() -> GeocodingService:
+    """Return the process-wide `GeocodingService`."""
+    global _service
+    if _service is None:
+        _service = GeocodingService()
+    return _service
+
+
+async def close_geocoding_service() -> None:
+    """Close the shared `GeocodingService` if it was created."""
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
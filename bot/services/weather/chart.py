@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import struct
+import zlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from bot.services.weather.models import HourlyForecast
+from bot.utils.debug_stats import register_metrics, register_store
+from core.singleflight import SingleFlight
+
+"""Hourly temperature charts as PNG images, drawn with the standard library only."""
+
+WIDTH = 480
+HEIGHT = 240
+# Plot area margins: room for temperature labels (left) and hours (bottom)
+MARGIN_LEFT = 36
+MARGIN_RIGHT = 12
+MARGIN_TOP = 14
+MARGIN_BOTTOM = 24
+
+BACKGROUND = (255, 255, 255)
+GRID = (225, 228, 234)
+AXIS = (120, 124, 132)
+TEXT = (60, 64, 72)
+LINE = (230, 96, 40)
+
+# 3x5 bitmap font, one string of 3 bits per row
+_GLYPHS = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "010", "010", "010"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    "-": ("000", "000", "111", "000", "000"),
+    "°": ("111", "101", "111", "000", "000"),
+    " ": ("000", "000", "000", "000", "000"),
+}
+
+
+class Canvas:
+    """Minimal RGB raster with line and text drawing and PNG export."""
+
+    def __init__(self, width: int, height: int, background: tuple[int, int, int] = BACKGROUND) -> None:
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(bytes(background) * (width * height))
+
+    def point(self, x: int, y: int, color: tuple[int, int, int]) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = (y * self.width + x) * 3
+            self.pixels[i : i + 3] = bytes(color)
+
+    def rect(self, x: int, y: int, w: int, h: int, color: tuple[int, int, int]) -> None:
+        """Fill a `w` x `h` rectangle whose top-left corner is (`x`, `y`)."""
+        x0, x1 = max(0, x), min(self.width, x + w)
+        if x0 >= x1:
+            return
+        row = bytes(color) * (x1 - x0)
+        for yy in range(max(0, y), min(self.height, y + h)):
+            i = (yy * self.width + x0) * 3
+            self.pixels[i : i + len(row)] = row
+
+    def line(self, x0: int, y0: int, x1: int, y1: int, color: tuple[int, int, int], width: int = 1) -> None:
+        """Draw a line with Bresenham's algorithm; `width` > 1 stamps squares."""
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+        err = dx + dy
+        off = width // 2
+        while True:
+            if width == 1:
+                self.point(x0, y0, color)
+            else:
+                self.rect(x0 - off, y0 - off, width, width, color)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, x: int, y: int, text: str, color: tuple[int, int, int], scale: int = 2) -> None:
+        """Draw `text` with its top-left corner at (`x`, `y`); unknown characters are skipped."""
+        for char in text:
+            glyph = _GLYPHS.get(char)
+            if glyph is not None:
+                for row, bits in enumerate(glyph):
+                    for col, bit in enumerate(bits):
+                        if bit == "1":
+                            self.rect(x + col * scale, y + row * scale, scale, scale, color)
+            x += 4 * scale
+
+    @staticmethod
+    def text_width(text: str, scale: int = 2) -> int:
+        return max(0, len(text) * 4 * scale - scale)
+
+    def to_png(self) -> bytes:
+        """Encode the canvas as an 8-bit RGB PNG."""
+        stride = self.width * 3
+        raw = bytearray()
+        for y in range(self.height):
+            raw.append(0)  # filter type "None"
+            raw += self.pixels[y * stride : (y + 1) * stride]
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(bytes(raw), 9))
+            + chunk(b"IEND", b"")
+        )
+
+
+def _temperature_step(span: float) -> int:
+    """Return a grid step that gives at most six horizontal grid lines."""
+    for step in (1, 2, 5, 10, 20):
+        if span / step <= 5:
+            return step
+    return 50
+
+
+def render_hourly_chart(forecast: HourlyForecast, width: int = WIDTH, height: int = HEIGHT) -> bytes:
+    """Render the forecast's temperature curve and return it as PNG bytes.
+
+    The y axis is labelled in °C, the x axis with the hour of every third
+    value (in the time zone the provider reported).
+    """
+    temps = forecast.temperatures
+    if not temps:
+        raise ValueError("forecast has no temperatures")
+
+    canvas = Canvas(width, height)
+    left, right = MARGIN_LEFT, width - MARGIN_RIGHT
+    top, bottom = MARGIN_TOP, height - MARGIN_BOTTOM
+
+    step = _temperature_step(max(temps) - min(temps))
+    low = math.floor(min(temps) / step) * step
+    high = max(math.ceil(max(temps) / step) * step, low + step)
+
+    def y_of(t: float) -> int:
+        return round(bottom - (t - low) / (high - low) * (bottom - top))
+
+    def x_of(i: int) -> int:
+        if len(temps) == 1:
+            return (left + right) // 2
+        return round(left + i * (right - left) / (len(temps) - 1))
+
+    # horizontal grid with temperature labels
+    for t in range(int(low), int(high) + 1, step):
+        y = y_of(t)
+        canvas.line(left, y, right, y, GRID)
+        label = f"{t}°"
+        canvas.text(left - 6 - Canvas.text_width(label), y - 5, label, TEXT)
+
+    # vertical grid every third hour with hour labels
+    for i, stamp in enumerate(forecast.times):
+        if i % 3:
+            continue
+        x = x_of(i)
+        canvas.line(x, top, x, bottom, GRID)
+        label = stamp[11:13]
+        canvas.text(x - Canvas.text_width(label) // 2, bottom + 8, label, TEXT)
+
+    canvas.line(left, top, left, bottom, AXIS)
+    canvas.line(left, bottom, right, bottom, AXIS)
+
+    points = [(x_of(i), y_of(t)) for i, t in enumerate(temps)]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        canvas.line(x0, y0, x1, y1, LINE, width=2)
+    for x, y in points:
+        canvas.rect(x - 2, y - 2, 4, 4, LINE)
+
+    return canvas.to_png()
+
+
+# (lat, lon, forecast run, provider)
+ChartKey = tuple[float, float, str, str]
+
+
+class _Chart:
+    __slots__ = ("png", "file_id")
+
+    def __init__(self, png: bytes | None = None) -> None:
+        self.png = png
+        self.file_id: str | None = None
+
+
+class ChartCache:
+    """Bounded LRU cache of rendered charts and their Telegram `file_id`s.
+
+    Entries are keyed by `(lat, lon, run, provider)` with coordinates rounded
+    to 4 decimals, so every user asking for the same place and source within
+    one forecast run shares an entry. The PNG bytes are kept only until the
+    first upload succeeds; after that the entry holds just the `file_id`,
+    which Telegram lets us resend without uploading the image again.
+
+    `render` draws in a worker thread so the event loop keeps serving other
+    chats, and both renders and uploads are single-flight per key.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = int(max_entries)
+        self._entries: OrderedDict[ChartKey, _Chart] = OrderedDict()
+        self.renders = 0
+        self.reuses = 0
+        self._renders = SingleFlight()
+        self._uploads = SingleFlight()
+
+    @staticmethod
+    def key(lat: float, lon: float, run: str, source: str | None = None) -> ChartKey:
+        return (round(lat, 4), round(lon, 4), run, source or "")
+
+    def _get(self, key: ChartKey) -> _Chart | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _add(self, key: ChartKey) -> _Chart:
+        entry = self._entries[key] = _Chart()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def file_id(self, key: ChartKey) -> str | None:
+        """Return the uploaded chart's `file_id` for `key`, if there is one."""
+        entry = self._get(key)
+        if entry is None or entry.file_id is None:
+            return None
+        self.reuses += 1
+        return entry.file_id
+
+    def _store_png(self, key: ChartKey, png: bytes) -> None:
+        self.renders += 1
+        entry = self._get(key) or self._add(key)
+        if entry.file_id is None:
+            entry.png = png
+
+    def png(self, key: ChartKey, forecast: HourlyForecast) -> bytes:
+        """Return the chart image for `key`, rendering `forecast` on a miss (blocking)."""
+        entry = self._get(key)
+        if entry is not None and entry.png is not None:
+            return entry.png
+        png = render_hourly_chart(forecast)
+        self._store_png(key, png)
+        return png
+
+    async def render(self, key: ChartKey, forecast: HourlyForecast) -> bytes:
+        """Like `png`, but renders in a worker thread; concurrent misses share one render."""
+        entry = self._get(key)
+        if entry is not None and entry.png is not None:
+            return entry.png
+        return await self._renders.do(key, lambda: self._render(key, forecast))
+
+    async def _render(self, key: ChartKey, forecast: HourlyForecast) -> bytes:
+        png = await asyncio.to_thread(render_hourly_chart, forecast)
+        self._store_png(key, png)
+        return png
+
+    async def upload_once(self, key: ChartKey, upload: Callable[[], Awaitable[str | None]]) -> str | None:
+        """Run `upload` unless an upload for `key` is already running; return its `file_id`.
+
+        Callers arriving during an upload wait for it instead of uploading
+        the same image again. `upload` should call `remember` on success.
+        """
+        return await self._uploads.do(key, upload)
+
+    def remember(self, key: ChartKey, file_id: str) -> None:
+        """Store the `file_id` Telegram returned for the uploaded chart."""
+        entry = self._get(key)
+        if entry is None:
+            entry = self._add(key)
+        entry.file_id = file_id
+        entry.png = None
+
+    def forget(self, key: ChartKey) -> None:
+        """Drop the stored `file_id` for `key` (e.g. when Telegram rejected it)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.file_id = None
+
+    def stats(self) -> dict[str, int]:
+        """Return entry counts, held image bytes and render/reuse counters."""
+        return {
+            "entries": len(self._entries),
+            "uploaded": sum(1 for e in self._entries.values() if e.file_id),
+            "png_bytes": sum(len(e.png) for e in self._entries.values() if e.png),
+            "renders": self.renders,
+            "reuses": self.reuses,
+        }
+
+
+_cache: ChartCache | None = None
+
+register_store("charts", lambda: _cache._entries if _cache else None)
+register_metrics("charts", lambda: _cache.stats() if _cache else None)
+
+
+def get_chart_cache() -> ChartCache:
+    """Return the process-wide `ChartCache`."""
+    global _cache
+    if _cache is None:
+        _cache = ChartCache()
+    return _cache
@@ -1,156 +1,201 @@
 from __future__ import annotations
 
-import asyncio
 import time
-from datetime import datetime
-
-import httpx
-from pydantic import BaseModel
-
-from core.logger import logger
-
-
-class WeatherReport(BaseModel):
-    temperature: float
-    windspeed: float
-    winddirection: float
-    weathercode: int
-    time: str
-    def format_time(self) -> str:
-        """Return a human-readable timestamp for the report's ISO time string."""
-        return datetime.fromisoformat(self.time).strftime("%Y-%m-%d %H:%M:%S")
-
-    @property
-    def condition(self) -> str:
-        """Return a short human-friendly description for the WMO weather code."""
-        descriptions = {
-            0: "Clear ☀️",
-            1: "Mainly clear 🌤",
-            2: "Partly cloudy ⛅️",
-            3: "Overcast ☁️",
-            45: "Fog 🌫",
-            48: "Depositing rime fog ❄️",
-            51: "Light drizzle 🌧",
-            61: "Light rain 🌦",
-            71: "Light snowfall 🌨",
-            95: "Thunderstorm ⛈",
-        }
-        return descriptions.get(self.weathercode, f"Code {self.weathercode}")
+from collections.abc import Iterable
+from typing import Any
+
+from bot.services.weather.limiter import limiter_stats
+from bot.services.weather.models import HourlyForecast, WeatherReport
+from bot.services.weather.providers import (
+    MetNorwayProvider,
+    OpenMeteoProvider,
+    ProviderBusy,
+    ProviderError,
+    WeatherProvider,
+)
+from bot.services.weather.router import ProviderRouter
+from bot.utils.debug_stats import register_metrics, register_store
+from core.logger import LogSampler, logger
+from core.singleflight import SingleFlight
+
+# Upstream failures tend to come in bursts; sample the per-request warnings.
+_upstream_log = LogSampler(interval=5.0, burst=3)
+
+__all__ = (
+    "HourlyForecast",
+    "WeatherReport",
+    "WeatherService",
+    "build_weather_message",
+    "close_weather_service",
+    "get_weather_service",
+)
 
 
 class WeatherService:
-    """Service responsible for fetching current weather from Open-Meteo.
+    """Service responsible for fetching current weather from pluggable providers.
 
     Features:
-    - optional in-memory caching with TTL (default: 60s)
-    - simple retry with exponential backoff
-    - configurable timeout and number of retries
+    - optional in-memory caching with TTL (default: 60s, 15 min for hourly forecasts)
+    - Open-Meteo first, MET Norway as fallback (see `ProviderRouter`)
+    - per-provider circuit breaking and p95-based request hedging
+    - adaptive per-upstream concurrency limits (see `AdaptiveLimiter`)
     """
 
-    BASE_URL = "https://api.open-meteo.com/v1/forecast"
-
     def __init__(
         self,
         timeout: float = 10.0,
         cache_ttl: int = 60,
-        max_retries: int = 3,
-        backoff_factor: float = 0.5,
+        providers: Iterable[WeatherProvider] | None = None,
+        hedge: bool = True,
+        hourly_ttl: int = 900,
     ) -> None:
         """Create the weather service.
 
         Args:
-            timeout: HTTP client timeout in seconds.
+            timeout: HTTP client timeout in seconds for the default providers.
             cache_ttl: Time-to-live for in-memory cache entries (seconds).
-            max_retries: Number of attempts for transient failures.
-            backoff_factor: Base backoff multiplier for retries.
+            providers: Providers to route between; defaults to Open-Meteo and MET Norway.
+            hedge: Whether slow requests are hedged to a second provider.
+            hourly_ttl: Time-to-live for cached hourly forecasts (seconds).
         """
-        self._client = httpx.AsyncClient(timeout=timeout)
+        if providers is None:
+            providers = [OpenMeteoProvider(timeout=timeout), MetNorwayProvider(timeout=timeout)]
+        self.router = ProviderRouter(providers, hedge=hedge)
         self._cache_ttl = int(cache_ttl)
-        self._cache: dict[tuple[float, float], tuple[float, WeatherReport | None]] = {}
-        self._max_retries = int(max_retries)
-        self._backoff = float(backoff_factor)
+        # (lat, lon, preferred provider or "") -> (stored at, report)
+        self._cache: dict[tuple[float, float, str], tuple[float, WeatherReport | None]] = {}
+        self._hourly_ttl = int(hourly_ttl)
+        self._hourly: dict[tuple[float, float, str], tuple[float, HourlyForecast | None]] = {}
+        # concurrent requests for the same key share one upstream fetch
+        self._inflight = SingleFlight()
 
     async def close(self) -> None:
-        """Close the underlying HTTP client connection pool."""
-        await self._client.aclose()
+        """Close all providers' connection pools."""
+        for provider in self.router.providers:
+            await provider.close()
+
+    def stats(self) -> dict:
+        """Return provider health and upstream limiter metrics."""
+        return {"providers": self.router.stats(), "limiters": limiter_stats()}
+
+    def _cache_key(self, lat: float, lon: float, source: str | None, kind: str = "current") -> tuple:
+        """Return the cache and single-flight key for a request.
 
-    def _get_cache(self, lat: float, lon: float) -> WeatherReport | None:
-        key = (round(lat, 4), round(lon, 4))
-        item = self._cache.get(key)
+        Requests whose preferred provider is known, supports `kind` and is
+        healthy are cached per provider, so the user's choice is honoured.
+        All other requests (no preference, provider unavailable) share the
+        "" entry and get whichever provider answered.
+        """
+        provider = self.router.find(source)
+        name = ""
+        if provider is not None and provider.supports(kind) and self.router.breakers[provider.name].available():
+            name = provider.name
+        return (round(lat, 4), round(lon, 4), name)
+
+    @staticmethod
+    def _lookup(cache: dict, key: tuple, ttl: int) -> tuple[bool, Any]:
+        item = cache.get(key)
         if not item:
-            return None
-        ts, report = item
-        if time.monotonic() - ts > self._cache_ttl:
+            return False, None
+        ts, value = item
+        if time.monotonic() - ts > ttl:
             # expired
-            del self._cache[key]
-            return None
-        return report
+            del cache[key]
+            return False, None
+        return True, value
 
-    def _set_cache(self, lat: float, lon: float, report: WeatherReport | None) -> None:
-        key = (round(lat, 4), round(lon, 4))
-        self._cache[key] = (time.monotonic(), report)
+    def peek(self, lat: float, lon: float, source: str | None = None) -> WeatherReport | None:
+        """Return the cached report for the coordinates without fetching."""
+        return self._lookup(self._cache, self._cache_key(lat, lon, source), self._cache_ttl)[1]
 
     @logger.catch
-    async def get_weather(self, lat: float, lon: float) -> WeatherReport | None:
-        """Fetch current weather for the specified coordinates with retries and caching.
+    async def get_weather(self, lat: float, lon: float, source: str | None = None) -> WeatherReport | None:
+        """Fetch current weather for the specified coordinates with failover and caching.
 
-        Returns a `WeatherReport` on success or `None` on failure.
+        `source` is the user's preferred provider; it is used while healthy.
+        Concurrent requests for the same coordinates and provider share one
+        upstream fetch. Returns a `WeatherReport` on success or `None` on failure.
         """
-        # Check cache first
-        cached = self._get_cache(lat, lon)
-        if cached is not None:
+        key = self._cache_key(lat, lon, source)
+        hit, cached = self._lookup(self._cache, key, self._cache_ttl)
+        if hit:
             logger.debug("Weather cache hit for {}, {}", lat, lon)
             return cached
 
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current_weather": "true",
-            "timezone": "auto",
-        }
-
-        last_exc: Exception | None = None
-        for attempt in range(1, self._max_retries + 1):
-            try:
-                logger.info("Requesting weather for coordinates: {}, {} (attempt {})", lat, lon, attempt)
-                response = await self._client.get(self.BASE_URL, params=params)
-                response.raise_for_status()
-                data = response.json().get("current_weather")
-                if not data:
-                    logger.error("API response missing 'current_weather' field")
-                    self._set_cache(lat, lon, None)
-                    return None
-
-                report = WeatherReport(**data)
-                # store successful response in cache
-                self._set_cache(lat, lon, report)
-                return report
-
-            except httpx.HTTPStatusError as e:
-                last_exc = e
-                status = e.response.status_code if e.response is not None else "?"
-                logger.warning("API returned HTTP status %s for coords %s,%s", status, lat, lon)
-                # For 4xx errors, do not retry
-                if 400 <= getattr(e.response, "status_code", 500) < 500:
-                    break
-            except httpx.RequestError as e:
-                last_exc = e
-                logger.warning("Request error for %s,%s: %s", lat, lon, e)
-            except Exception as e:
-                last_exc = e
-                logger.exception("Unexpected error while fetching weather for %s,%s", lat, lon)
-
-            # exponential backoff with jitter
-            if attempt < self._max_retries:
-                backoff = self._backoff * (2 ** (attempt - 1))
-                jitter = backoff * 0.1
-                wait = backoff + (jitter * (0.5 - asyncio.get_event_loop().time() % 1))
-                await asyncio.sleep(max(0.1, wait))
-
-        logger.error("Failed to fetch weather after %s attempts: %s", self._max_retries, last_exc)
-        # cache negative result briefly to avoid tight loops
-        self._set_cache(lat, lon, None)
-        return None
+        return await self._inflight.do(("current", *key), lambda: self._fetch(key, lat, lon, source))
+
+    @logger.catch
+    async def get_hourly(self, lat: float, lon: float, source: str | None = None) -> HourlyForecast | None:
+        """Fetch the hourly temperature forecast for the coordinates.
+
+        Works like `get_weather` with a separate, longer-lived cache.
+        Returns an `HourlyForecast` on success or `None` on failure.
+        """
+        key = self._cache_key(lat, lon, source, kind="hourly")
+        hit, cached = self._lookup(self._hourly, key, self._hourly_ttl)
+        if hit:
+            return cached
+
+        return await self._inflight.do(("hourly", *key), lambda: self._fetch_hourly(key, lat, lon, source))
+
+    async def _fetch(self, key: tuple, lat: float, lon: float, source: str | None) -> WeatherReport | None:
+        logger.debug("Requesting weather for coordinates: {}, {} (source {})", lat, lon, source)
+        try:
+            report = await self.router.fetch(lat, lon, preferred=source)
+        except ProviderBusy as e:
+            # local back-pressure: fail this request but let the next one try
+            _upstream_log.log("fetch_busy", "WARNING", "Weather request for {},{} not sent: {}", lat, lon, e)
+            return None
+        except ProviderError as e:
+            _upstream_log.log("fetch_failed", "ERROR", "Failed to fetch weather for {},{}: {}", lat, lon, e)
+            # cache negative result briefly to avoid tight loops
+            self._cache[key] = (time.monotonic(), None)
+            return None
+
+        self._cache[key] = (time.monotonic(), report)
+        return report
+
+    async def _fetch_hourly(self, key: tuple, lat: float, lon: float, source: str | None) -> HourlyForecast | None:
+        try:
+            forecast = await self.router.fetch(lat, lon, preferred=source, kind="hourly")
+        except ProviderBusy as e:
+            _upstream_log.log("hourly_busy", "WARNING", "Forecast request for {},{} not sent: {}", lat, lon, e)
+            return None
+        except ProviderError as e:
+            _upstream_log.log("hourly_failed", "ERROR", "Failed to fetch forecast for {},{}: {}", lat, lon, e)
+            # negative results expire with the current-weather TTL
+            self._hourly[key] = (time.monotonic() - self._hourly_ttl + self._cache_ttl, None)
+            return None
+
+        self._hourly[key] = (time.monotonic(), forecast)
+        return forecast
+
+
+_service: WeatherService | None = None
+
+register_store("weather.current", lambda: _service._cache if _service else None)
+register_store("weather.hourly", lambda: _service._hourly if _service else None)
+register_metrics("weather", lambda: _service.stats() if _service else None)
+
+
+def get_weather_service() -> WeatherService:
+    """Return the process-wide `WeatherService`.
+
+    Sharing one instance keeps the cache, connection pools, circuit breakers
+    and latency statistics alive across updates.
+    """
+    global _service
+    if _service is None:
+        _service = WeatherService()
+    return _service
+
+
+async def close_weather_service() -> None:
+    """Close the shared `WeatherService` if it was created."""
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
 
 
 def build_weather_message(report: WeatherReport) -> str:
@@ -165,5 +210,6 @@ def build_weather_message(report: WeatherReport) -> str:
         f"☁️ Condition: {report.condition}\n"
         f"💨 Wind: {report.windspeed} km/h ({report.winddirection}°)\n"
         f"🕒 Time (UTC): {report.format_time()}\n"
-        f"━━━━━━━━━━━━━━━"
+        + (f"🛰 Source: {report.source}\n" if report.source else "")
+        + "━━━━━━━━━━━━━━━"
     )
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies for one provider."""
+
+    def __init__(self, window: int = 100) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample (in seconds)."""
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        """Return the `q`-th percentile (0..100) of the window, or None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        idx = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[idx]
+
+    def p95(self) -> float | None:
+        """Return the 95th percentile latency, or None if there are no samples."""
+        return self.percentile(95)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    States:
+    - closed: calls flow normally; `failure_threshold` consecutive failures open it
+    - open: calls are rejected until `reset_timeout` seconds have passed
+    - half-open: a single probe call is let through; success closes the
+      breaker, failure re-opens it for another `reset_timeout`
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def available(self) -> bool:
+        """Return True if a call would currently be allowed (without reserving it)."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight)
+
+    def acquire(self) -> bool:
+        """Reserve a call slot; returns False if the breaker rejects the call."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back a slot whose call finished without a health verdict (e.g. cancelled)."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
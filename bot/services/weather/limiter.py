@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+
+class LimiterTimeout(Exception):
+    """Raised when a caller could not get a slot before its deadline."""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a `Retry-After` header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter for calls to one upstream.
+
+    The concurrency limit grows by roughly one slot per limit's worth of
+    successful calls (additive increase) and is multiplied by `backoff_ratio`
+    when the upstream signals overload with 429/503 or a timeout
+    (multiplicative decrease). A `Retry-After` hint pauses all new calls until
+    it expires. Callers beyond the limit wait in a FIFO queue, bounded by
+    `max_queue`, and give up with `LimiterTimeout` once their deadline passes
+    so user-facing requests fail fast instead of piling up.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        backoff_ratio: float = 0.5,
+        max_queue: int = 100,
+    ) -> None:
+        """Create the limiter.
+
+        Args:
+            initial_limit: Starting number of concurrent calls.
+            min_limit: The limit never drops below this value.
+            max_limit: The limit never grows above this value.
+            backoff_ratio: Multiplier applied to the limit on overload.
+            max_queue: Callers rejected immediately once this many are waiting.
+        """
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.backoff_ratio = float(backoff_ratio)
+        self.max_queue = int(max_queue)
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._blocked_until = 0.0
+        self._wake_handle: asyncio.TimerHandle | None = None
+        self.rejected = 0
+        self.timeouts = 0
+        self.overloads = 0
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict[str, float]:
+        """Return the current limit, usage and counters as a metrics mapping."""
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "blocked_for": max(0.0, self._blocked_until - time.monotonic()),
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "overloads": self.overloads,
+        }
+
+    def _can_start(self) -> bool:
+        return self._in_flight < self.limit and time.monotonic() >= self._blocked_until
+
+    async def acquire(self, timeout: float | None = None) -> None:
+        """Wait for a call slot for at most `timeout` seconds.
+
+        Raises `LimiterTimeout` if the queue is full, if a `Retry-After` pause
+        outlasts the deadline, or if no slot frees up in time.
+        """
+        if not self._waiters and self._can_start():
+            self._in_flight += 1
+            return
+        blocked_for = self._blocked_until - time.monotonic()
+        if timeout is not None and blocked_for > timeout:
+            self.rejected += 1
+            raise LimiterTimeout(f"upstream asked to retry after {blocked_for:.1f}s")
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LimiterTimeout("upstream queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._schedule_wake()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self._in_flight -= 1
+                self._wake()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, TimeoutError):
+                self.timeouts += 1
+                raise LimiterTimeout("timed out waiting for an upstream slot") from None
+            raise
+
+    def release(self, latency: float | None = None, overloaded: bool = False, retry_after: float | None = None) -> None:
+        """Return a slot and feed the call outcome into the limit.
+
+        Args:
+            latency: Call duration for a successful call; None if the call
+                was cancelled or failed for reasons unrelated to load.
+            overloaded: The upstream signalled overload (429/503/timeout).
+            retry_after: Seconds from a `Retry-After` header, if any.
+        """
+        self._in_flight -= 1
+        if overloaded:
+            self.overloads += 1
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        elif latency is not None and self._in_flight + 1 >= self.limit / 2:
+            # Only grow while the current limit is actually being used.
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._can_start():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+        self._schedule_wake()
+
+    def _schedule_wake(self) -> None:
+        # Waiters blocked only by a Retry-After pause need a timer to resume.
+        delay = self._blocked_until - time.monotonic()
+        if not self._waiters or delay <= 0 or self._wake_handle is not None:
+            return
+
+        def fire() -> None:
+            self._wake_handle = None
+            self._wake()
+
+        self._wake_handle = asyncio.get_running_loop().call_later(delay, fire)
+
+
+async def limited_get(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveLimiter,
+    url: str,
+    queue_timeout: float | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """GET `url` through `limiter` and feed the outcome back into it.
+
+    Waits at most `queue_timeout` seconds for a slot (see `acquire`). 429/503
+    responses and timeouts are reported as overload, together with any
+    `Retry-After` hint; successful calls report their latency. Errors are
+    raised as usual: `LimiterTimeout`, or httpx's exceptions including
+    `HTTPStatusError` for error statuses.
+    """
+    await limiter.acquire(queue_timeout)
+    started = time.monotonic()
+    latency: float | None = None
+    overloaded = False
+    retry_after: float | None = None
+    try:
+        response = await client.get(url, **kwargs)
+        if response.status_code in (429, 503):
+            overloaded = True
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        response.raise_for_status()
+        latency = time.monotonic() - started
+        return response
+    except httpx.TimeoutException:
+        overloaded = True
+        raise
+    finally:
+        limiter.release(latency=latency, overloaded=overloaded, retry_after=retry_after)
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(upstream: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter for `upstream`, creating it on first use."""
+    limiter = _limiters.get(upstream)
+    if limiter is None:
+        limiter = _limiters[upstream] = AdaptiveLimiter()
+    return limiter
+
+
+def limiter_stats() -> dict[str, dict[str, float]]:
+    """Return metrics for every upstream limiter created so far."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class WeatherReport(BaseModel):
+    temperature: float
+    windspeed: float
+    winddirection: float
+    weathercode: int
+    time: str
+    source: str | None = None
+
+    def format_time(self) -> str:
+        """Return a human-readable timestamp for the report's ISO time string."""
+        return datetime.fromisoformat(self.time).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def stamp(self) -> int:
+        """Return the report time as a compact integer (YYYYMMDDHHMM)."""
+        return int(datetime.fromisoformat(self.time).strftime("%Y%m%d%H%M"))
+
+    @property
+    def digest(self) -> str:
+        """Return a short fingerprint of the displayed values."""
+        values = f"{self.temperature}|{self.windspeed}|{self.winddirection}|{self.weathercode}|{self.source}"
+        return hashlib.blake2s(values.encode(), digest_size=4).hexdigest()
+
+    @property
+    def condition(self) -> str:
+        """Return a short human-friendly description for the WMO weather code."""
+        descriptions = {
+            0: "Clear ☀️",
+            1: "Mainly clear 🌤",
+            2: "Partly cloudy ⛅️",
+            3: "Overcast ☁️",
+            45: "Fog 🌫",
+            48: "Depositing rime fog ❄️",
+            51: "Light drizzle 🌧",
+            61: "Light rain 🌦",
+            71: "Light snowfall 🌨",
+            95: "Thunderstorm ⛈",
+        }
+        return descriptions.get(self.weathercode, f"Code {self.weathercode}")
+
+
+class HourlyForecast(BaseModel):
+    """Temperature forecast for the next hours at one location.
+
+    `times` are ISO timestamps as returned by the provider (local time for
+    Open-Meteo, UTC for MET Norway). `run` identifies the forecast the
+    values come from. Neither API exposes the model run time on these
+    endpoints, so it is the UTC hour of the fetch (YYYYMMDDHH). Forecasts
+    fetched within the same hour are treated as identical.
+    """
+
+    times: list[str]
+    temperatures: list[float]
+    run: str
+    source: str | None = None
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from bot.services.weather.limiter import AdaptiveLimiter, LimiterTimeout, get_limiter, limited_get
+from bot.services.weather.models import HourlyForecast, WeatherReport
+
+# Number of hourly values in an `HourlyForecast`
+FORECAST_HOURS = 24
+
+
+class ProviderError(Exception):
+    """Raised by a provider when it cannot produce a report.
+
+    `transient` marks failures that say something about the provider's health
+    (timeouts, 5xx, connection errors) as opposed to request errors (4xx,
+    malformed payloads for a given location). Only transient failures count
+    against the provider's circuit breaker.
+    """
+
+    def __init__(self, provider: str, message: str, transient: bool = True) -> None:
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.transient = transient
+
+
+class ProviderBusy(ProviderError):
+    """Raised when a request was never sent because of local back-pressure.
+
+    Covers a full limiter queue, a `Retry-After` pause and a missed slot
+    deadline, and, from `ProviderRouter`, the case where no provider could
+    take the request. It says nothing about the weather at a location, so
+    callers should not cache it as a failed lookup.
+    """
+
+    def __init__(self, provider: str, message: str) -> None:
+        super().__init__(provider, message, transient=False)
+
+
+def forecast_run() -> str:
+    """Return the identifier of the current forecast run (UTC hour, YYYYMMDDHH)."""
+    return datetime.now(timezone.utc).strftime("%Y%m%d%H")
+
+
+def normalize_source(text: str) -> str:
+    """Return a comparison key for a provider name ("Open-Meteo" -> "openmeteo")."""
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+class WeatherProvider(ABC):
+    """Interface every weather backend implements.
+
+    Implementations fetch the current weather for a coordinate pair and return
+    a `WeatherReport`, raising `ProviderError` on failure. They must not retry
+    internally: retries, failover and hedging are handled by `ProviderRouter`.
+    """
+
+    #: Stable identifier stored in user preferences.
+    name: str = ""
+    #: Human-readable name shown on keyboards.
+    title: str = ""
+    #: Request kinds the provider implements ("current", "hourly").
+    kinds: frozenset[str] = frozenset({"current"})
+
+    def matches(self, source: str) -> bool:
+        """Return True if the user-facing `source` string refers to this provider."""
+        key = normalize_source(source)
+        return key in (normalize_source(self.name), normalize_source(self.title))
+
+    def supports(self, kind: str) -> bool:
+        """Return True if the provider implements the request `kind`."""
+        return kind in self.kinds
+
+    @abstractmethod
+    async def fetch_current(self, lat: float, lon: float) -> WeatherReport:
+        """Fetch the current weather for the given coordinates."""
+
+    async def fetch_hourly(self, lat: float, lon: float) -> HourlyForecast:
+        """Fetch the temperature forecast for the next `FORECAST_HOURS` hours."""
+        raise ProviderError(self.name, "hourly forecasts are not supported", transient=False)
+
+    async def close(self) -> None:
+        """Release any resources held by the provider."""
+
+
+class HttpProvider(WeatherProvider):
+    """Base class for providers backed by a JSON HTTP API.
+
+    Every request goes through the upstream's shared `AdaptiveLimiter`;
+    callers wait at most `queue_timeout` seconds for a slot.
+    """
+
+    #: Limiter key; providers talking to the same upstream share one limiter.
+    upstream: str = ""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        client: httpx.AsyncClient | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        queue_timeout: float = 2.0,
+    ) -> None:
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+        self.limiter = limiter or get_limiter(self.upstream or self.name)
+        self.queue_timeout = float(queue_timeout)
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client connection pool."""
+        await self._client.aclose()
+
+    async def _get_json(self, url: str, **kwargs) -> dict:
+        try:
+            response = await limited_get(self._client, self.limiter, url, self.queue_timeout, **kwargs)
+            return response.json()
+        except LimiterTimeout as e:
+            # Local back-pressure, not a sign of provider failure.
+            raise ProviderBusy(self.name, str(e)) from e
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            transient = status in (429, 503) or not 400 <= status < 500
+            raise ProviderError(self.name, f"HTTP {status}", transient=transient) from e
+        except httpx.TimeoutException as e:
+            raise ProviderError(self.name, f"timeout: {e!r}") from e
+        except httpx.RequestError as e:
+            raise ProviderError(self.name, f"request error: {e!r}") from e
+        except ValueError as e:
+            raise ProviderError(self.name, "invalid JSON response", transient=False) from e
+
+
+class OpenMeteoProvider(HttpProvider):
+    """Current weather from the Open-Meteo forecast API."""
+
+    name = "open-meteo"
+    title = "Open-Meteo"
+    upstream = "open-meteo"
+    kinds = frozenset({"current", "hourly"})
+    BASE_URL = "https://api.open-meteo.com/v1/forecast"
+
+    async def fetch_current(self, lat: float, lon: float) -> WeatherReport:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": "true",
+            "timezone": "auto",
+        }
+        data = (await self._get_json(self.BASE_URL, params=params)).get("current_weather")
+        if not data:
+            raise ProviderError(self.name, "response missing 'current_weather' field", transient=False)
+        return WeatherReport(**data, source=self.name)
+
+    async def fetch_hourly(self, lat: float, lon: float) -> HourlyForecast:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": "temperature_2m",
+            "forecast_days": 2,
+            "timezone": "auto",
+        }
+        payload = await self._get_json(self.BASE_URL, params=params)
+        try:
+            hourly = payload["hourly"]
+            times, temps = hourly["time"], hourly["temperature_2m"]
+            # times are local; start the window at the current local hour
+            offset = timedelta(seconds=payload.get("utc_offset_seconds", 0))
+            now = (datetime.now(timezone.utc) + offset).strftime("%Y-%m-%dT%H:00")
+            start = next((i for i, t in enumerate(times) if t >= now), 0)
+            end = start + FORECAST_HOURS
+            if not temps[start:end]:
+                raise ProviderError(self.name, "empty hourly forecast", transient=False)
+            return HourlyForecast(
+                times=times[start:end],
+                temperatures=temps[start:end],
+                run=forecast_run(),
+                source=self.name,
+            )
+        except (KeyError, TypeError) as e:
+            raise ProviderError(self.name, f"unexpected payload: {e!r}", transient=False) from e
+
+
+class MetNorwayProvider(HttpProvider):
+    """Current weather from the MET Norway Locationforecast API.
+
+    The API returns symbol codes instead of WMO weather codes and wind speed
+    in m/s; both are converted so reports are interchangeable with Open-Meteo.
+    """
+
+    name = "met-norway"
+    title = "MET Norway"
+    upstream = "met-norway"
+    kinds = frozenset({"current", "hourly"})
+    BASE_URL = "https://api.met.no/weatherapi/locationforecast/2.0/compact"
+    # MET Norway requires an identifying User-Agent on every request.
+    USER_AGENT = "tg-prognoz/0.1 github.com/PolitexProg/weather-tg-bot"
+
+    # Symbol code (without _day/_night suffix) -> closest WMO weather code.
+    SYMBOL_TO_WMO = {
+        "clearsky": 0,
+        "fair": 1,
+        "partlycloudy": 2,
+        "cloudy": 3,
+        "fog": 45,
+        "lightrain": 61,
+        "lightrainshowers": 61,
+        "rain": 61,
+        "rainshowers": 61,
+        "heavyrain": 61,
+        "heavyrainshowers": 61,
+        "lightsnow": 71,
+        "lightsnowshowers": 71,
+        "snow": 71,
+        "snowshowers": 71,
+        "heavysnow": 71,
+    }
+
+    def __init__(self, timeout: float = 10.0, client: httpx.AsyncClient | None = None, **kwargs) -> None:
+        super().__init__(
+            timeout=timeout,
+            client=client or httpx.AsyncClient(timeout=timeout, headers={"User-Agent": self.USER_AGENT}),
+            **kwargs,
+        )
+
+    @classmethod
+    def _weathercode(cls, symbol: str | None) -> int:
+        if not symbol:
+            return 3
+        base = symbol.split("_", 1)[0]
+        if "thunder" in base:
+            return 95
+        return cls.SYMBOL_TO_WMO.get(base, 3)
+
+    async def _timeseries(self, lat: float, lon: float) -> list[dict]:
+        # MET Norway asks clients to use at most 4 decimals to keep its cache effective
+        params = {"lat": round(lat, 4), "lon": round(lon, 4)}
+        payload = await self._get_json(self.BASE_URL, params=params)
+        try:
+            return payload["properties"]["timeseries"]
+        except (KeyError, TypeError) as e:
+            raise ProviderError(self.name, f"unexpected payload: {e!r}", transient=False) from e
+
+    async def fetch_hourly(self, lat: float, lon: float) -> HourlyForecast:
+        series = await self._timeseries(lat, lon)
+        try:
+            # the first ~2.5 days are hourly; times are UTC
+            entries = series[:FORECAST_HOURS]
+            if not entries:
+                raise ProviderError(self.name, "empty hourly forecast", transient=False)
+            return HourlyForecast(
+                times=[e["time"].replace("Z", "+00:00") for e in entries],
+                temperatures=[e["data"]["instant"]["details"]["air_temperature"] for e in entries],
+                run=forecast_run(),
+                source=self.name,
+            )
+        except (KeyError, TypeError) as e:
+            raise ProviderError(self.name, f"unexpected payload: {e!r}", transient=False) from e
+
+    async def fetch_current(self, lat: float, lon: float) -> WeatherReport:
+        series = await self._timeseries(lat, lon)
+        try:
+            entry = series[0]
+            details = entry["data"]["instant"]["details"]
+            symbol = entry["data"].get("next_1_hours", {}).get("summary", {}).get("symbol_code")
+            return WeatherReport(
+                temperature=details["air_temperature"],
+                windspeed=round(details["wind_speed"] * 3.6, 1),
+                winddirection=details["wind_from_direction"],
+                weathercode=self._weathercode(symbol),
+                time=entry["time"].replace("Z", "+00:00"),
+                source=self.name,
+            )
+        except (KeyError, IndexError, TypeError) as e:
+            raise ProviderError(self.name, f"unexpected payload: {e!r}", transient=False) from e
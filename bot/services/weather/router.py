@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterable
+
+from bot.services.weather.health import CircuitBreaker, LatencyTracker
+from bot.services.weather.models import HourlyForecast, WeatherReport
+from bot.services.weather.providers import ProviderBusy, ProviderError, WeatherProvider
+from core.logger import LogSampler
+
+# Provider failures come in bursts during outages; sample the warnings.
+_router_log = LogSampler(interval=5.0, burst=3)
+
+
+class ProviderRouter:
+    """Route weather requests across providers with failover and hedging.
+
+    Each provider has its own `CircuitBreaker` and `LatencyTracker`. A request
+    goes to the user's preferred provider when its breaker allows it, otherwise
+    to the healthy provider with the lowest p95 latency. If the first call has
+    not answered within that provider's p95 (clamped to
+    `[hedge_min_delay, hedge_max_delay]`) a hedged call is sent to the next
+    provider and whichever succeeds first wins; the loser is cancelled. A call
+    that fails is replaced by the next candidate immediately.
+    """
+
+    def __init__(
+        self,
+        providers: Iterable[WeatherProvider],
+        hedge: bool = True,
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        """Create the router.
+
+        Args:
+            providers: Providers in default priority order.
+            hedge: Whether to send hedged requests to a second provider.
+            hedge_min_delay: Lower bound for the hedge delay (seconds).
+            hedge_max_delay: Upper bound, also used while a provider has no samples.
+            failure_threshold: Consecutive transient failures that open a breaker.
+            reset_timeout: Seconds an open breaker waits before a probe call.
+        """
+        self.providers = list(providers)
+        if not self.providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        self.hedge = hedge
+        self.hedge_min_delay = float(hedge_min_delay)
+        self.hedge_max_delay = float(hedge_max_delay)
+        self.breakers = {p.name: CircuitBreaker(failure_threshold, reset_timeout) for p in self.providers}
+        self.latency = {p.name: LatencyTracker() for p in self.providers}
+
+    def find(self, source: str | None) -> WeatherProvider | None:
+        """Return the provider matching a user-facing source name, if any."""
+        if not source:
+            return None
+        return next((p for p in self.providers if p.matches(source)), None)
+
+    def hedge_delay(self, provider: WeatherProvider) -> float:
+        """Return how long to wait on `provider` before hedging to the next one."""
+        p95 = self.latency[provider.name].p95()
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p95))
+
+    def candidates(self, preferred: str | None = None, kind: str = "current") -> list[WeatherProvider]:
+        """Return healthy providers supporting `kind` in the order they should be tried."""
+        healthy = [p for p in self.providers if p.supports(kind) and self.breakers[p.name].available()]
+        healthy.sort(key=lambda p: self.latency[p.name].p95() or self.hedge_max_delay)
+        chosen = self.find(preferred)
+        if chosen is not None and chosen in healthy:
+            healthy.remove(chosen)
+            healthy.insert(0, chosen)
+        return healthy
+
+    def stats(self) -> dict[str, dict]:
+        """Return breaker state and latency figures per provider."""
+        return {
+            p.name: {
+                "state": self.breakers[p.name].state,
+                "samples": len(self.latency[p.name]),
+                "p95": self.latency[p.name].p95(),
+            }
+            for p in self.providers
+        }
+
+    async def _call(
+        self, provider: WeatherProvider, kind: str, lat: float, lon: float
+    ) -> WeatherReport | HourlyForecast:
+        breaker = self.breakers[provider.name]
+        started = time.monotonic()
+        try:
+            if kind == "hourly":
+                report = await provider.fetch_hourly(lat, lon)
+            else:
+                report = await provider.fetch_current(lat, lon)
+        except asyncio.CancelledError:
+            # Lost a hedge race: the elapsed time is a lower bound of the real
+            # latency, record it so a slow provider's p95 keeps growing.
+            self.latency[provider.name].record(time.monotonic() - started)
+            breaker.release()
+            raise
+        except ProviderError as e:
+            if e.transient:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            raise ProviderError(provider.name, f"unexpected error: {e!r}") from e
+        self.latency[provider.name].record(time.monotonic() - started)
+        breaker.record_success()
+        return report
+
+    async def fetch(
+        self, lat: float, lon: float, preferred: str | None = None, kind: str = "current"
+    ) -> WeatherReport | HourlyForecast:
+        """Fetch a report, honouring `preferred` when that provider is healthy.
+
+        `kind` is "current" for a `WeatherReport` or "hourly" for an
+        `HourlyForecast`. Raises `ProviderBusy` if no request reached an
+        upstream (no healthy provider, or every call was turned away by its
+        limiter) and `ProviderError` if the upstreams failed; the latter is
+        `transient` if any of the failures was.
+        """
+        queue = self.candidates(preferred, kind)
+        pending: dict[asyncio.Task, WeatherProvider] = {}
+        errors: list[BaseException] = []
+        last: WeatherProvider | None = None
+        last_started = 0.0
+
+        def launch() -> bool:
+            nonlocal last, last_started
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].acquire():
+                    pending[asyncio.ensure_future(self._call(provider, kind, lat, lon))] = provider
+                    last, last_started = provider, time.monotonic()
+                    return True
+            return False
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and queue and last is not None:
+                    timeout = max(0.0, last_started + self.hedge_delay(last) - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    _router_log.log("hedge", "DEBUG", "Hedging slow {} request", last.name)
+                    launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        return task.result()
+                    errors.append(exc)
+                    _router_log.log(provider.name, "WARNING", "Weather provider failed: {}", exc)
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        detail = "; ".join(str(e) for e in errors) or "no healthy providers"
+        if all(isinstance(e, ProviderBusy) for e in errors):
+            raise ProviderBusy("router", detail)
+        transient = any(not isinstance(e, ProviderError) or e.transient for e in errors)
+        raise ProviderError("router", detail, transient=transient)
@@ -6,21 +6,46 @@ from pathlib import Path
 # Ensure project root is on sys.path so `bot.*` imports work when run as a script
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-# Configure logging early
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from dotenv import load_dotenv
-from handlers.profile import router as profile_router  # noqa: E402
-
-# Импортируем наши наработки
-from bot.database.base import async_session, proceed_schemas
-from bot.handlers.common import router as common_router
-from bot.handlers.source_handlers import router as source_router
-from bot.middlewares.session import DbSessionMiddleware
-from bot.middlewares.throttle import ThrottleMiddleware
-from core.logger import logger  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+from core.startup import StartupProfiler  # noqa: E402
 
 load_dotenv()
+
+# STARTUP_PROFILE=1 logs per-module import and initialisation times
+profiler = StartupProfiler.from_env()
+
+# Configure logging early
+with profiler.step("setup logging"):
+    from core.logger import logger, setup_logging  # noqa: E402
+
+    setup_logging()
+
+with profiler.step("import aiogram"):
+    from aiogram import Bot, Dispatcher  # noqa: E402
+    from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+# Импортируем наши наработки. Handlers load SQLAlchemy, httpx and the weather
+# services lazily, on the first update that needs them.
+profile_router = profiler.import_module("handlers.profile").router
+common_router = profiler.import_module("bot.handlers.common").router
+source_router = profiler.import_module("bot.handlers.source_handlers").router
+inline_router = profiler.import_module("bot.handlers.inline").router
+debug_router = profiler.import_module("bot.handlers.debug").router
+
+from bot.database.schema import ensure_schema  # noqa: E402
+from bot.middlewares.correlation import CorrelationMiddleware  # noqa: E402
+from bot.middlewares.dedup import DedupMiddleware  # noqa: E402
+from bot.middlewares.scheduler import get_scheduler  # noqa: E402
+from bot.middlewares.session import DbSessionMiddleware  # noqa: E402
+from bot.middlewares.throttle import ThrottleMiddleware  # noqa: E402
+from bot.utils.debug_stats import get_loop_monitor, register_metrics, register_store  # noqa: E402
+from core.lazy import is_loaded, lazy_import  # noqa: E402
+
+db = lazy_import("bot.database.base")
+geocoding = lazy_import("bot.services.geocoding.geocoder")
+weather = lazy_import("bot.services.weather.get_data")
+
 TOKEN = getenv("BOT_TOKEN")
 
 # Ensure TOKEN is a valid string
@@ -28,30 +53,77 @@ if not TOKEN:
     raise ValueError("BOT_TOKEN environment variable is not set")
 
 # At this point, TOKEN is guaranteed to be a string
-bot = Bot(token=TOKEN)
-
-logger.info("BOT_TOKEN: {}", TOKEN)
+with profiler.step("create Bot"):
+    bot = Bot(token=TOKEN)
 
 
-async def main():
-    """Application entrypoint: prepare DB, register middleware and start polling.
+async def close_services() -> None:
+    """Close the shared services' connection pools, if they were ever loaded."""
+    if is_loaded(weather):
+        await weather.close_weather_service()
+    if is_loaded(geocoding):
+        await geocoding.close_geocoding_service()
 
-    This coroutine is executed when `bot/start.py` is run as a script and
-    performs one-time initialization (schemas) before starting the aiogram
-    dispatcher polling loop.
-    """
-    # Создаем таблицы, если их нет
-    await proceed_schemas()
 
-    dp = Dispatcher(storage=MemoryStorage())
+def build_dispatcher() -> Dispatcher:
+    """Create the dispatcher with all middleware and routers registered."""
+    # Updates of one chat run in order, different chats run in parallel
+    storage, scheduler = MemoryStorage(), get_scheduler()
+    dp = Dispatcher(storage=storage, events_isolation=scheduler)
 
     # Регистрируем Middleware (before routers so they wrap all handlers)
-    dp.update.middleware(DbSessionMiddleware(session_pool=async_session))
-    dp.update.middleware(ThrottleMiddleware(rate=1.0))
+    dp.update.middleware(CorrelationMiddleware())
+    # Redelivered updates stop here, before opening a session or throttling
+    dedup = DedupMiddleware(persist=True)
+    dp.update.middleware(dedup)
+    sessions = DbSessionMiddleware(session_pool=lambda: db.async_session())
+    dp.update.middleware(sessions)
+    throttle = ThrottleMiddleware(rate=1.0)
+    dp.update.middleware(throttle)
+
+    # In-process state reported by /debug_stats
+    register_store("fsm.memory_storage", lambda: storage.storage)
+    register_store("scheduler.queues", lambda: scheduler.queues)
+    register_store("dedup.recent", lambda: dedup.recent)
+    register_store("throttle.last", lambda: throttle.last_seen)
+    register_store("db.identity_maps", sessions.identity_map_objects)
+    register_metrics("scheduler", scheduler.stats)
+    register_metrics("dedup", dedup.stats)
 
     dp.include_router(common_router)
     dp.include_router(source_router)
     dp.include_router(profile_router)
+    dp.include_router(inline_router)
+    dp.include_router(debug_router)
+    dp.startup.register(dedup.startup)
+    dp.startup.register(get_loop_monitor().start)
+    dp.shutdown.register(dedup.shutdown)
+    dp.shutdown.register(get_loop_monitor().stop)
+    dp.shutdown.register(close_services)
+    return dp
+
+
+async def prepare() -> Dispatcher:
+    """Run one-time initialisation and return a dispatcher ready for polling."""
+    # Создаем таблицы, если их нет (skipped when the stored schema version matches)
+    with profiler.step("ensure schema"):
+        await ensure_schema()
+
+    with profiler.step("build dispatcher"):
+        dp = build_dispatcher()
+
+    profiler.report()
+    return dp
+
+
+async def main():
+    """Application entrypoint: prepare DB, register middleware and start polling.
+
+    This coroutine is executed when `bot/start.py` is run as a script and
+    performs one-time initialization (schemas) before starting the aiogram
+    dispatcher polling loop.
+    """
+    dp = await prepare()
     await dp.start_polling(bot)
 
 
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
+from bot.keyboards.choice_kb import POPULAR_CITIES
+from bot.utils.debug_stats import register_store
+from bot.utils.get_coords import load_gazetteer, normalize_city_name
+
+
+class CityIndex:
+    """Prefix index over city names for autocompletion.
+
+    Every word-start of a normalised name is stored in one sorted list, so
+    "lon" finds "London" and "york" finds "New York". A lookup is a `bisect`
+    plus a scan over at most `max_scan` adjacent keys, and matches are ranked
+    by popularity (weather requests served in this process, seeded from the
+    quick-button cities).
+    """
+
+    def __init__(self, max_scan: int = 200) -> None:
+        self.max_scan = int(max_scan)
+        # sorted (key, canonical name) pairs
+        self._keys: list[tuple[str, str]] = []
+        # canonical name -> (lat, lon)
+        self._coords: dict[str, tuple[float, float]] = {}
+        self._popularity: dict[str, int] = {}
+
+    @classmethod
+    def from_gazetteer(cls, popular: Iterable[str] = ()) -> CityIndex:
+        """Build the index from `coords.json`; `popular` names rank first, in order."""
+        index = cls()
+        for name, coords in load_gazetteer().values():
+            index.add(name, coords["lat"], coords["lon"])
+        popular = list(popular)
+        for rank, name in enumerate(popular):
+            if name in index._coords:
+                index._popularity[name] = len(popular) - rank
+        return index
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._coords
+
+    def add(self, name: str, lat: float, lon: float) -> None:
+        """Add a city (no-op if it is already indexed)."""
+        if name in self._coords:
+            return
+        self._coords[name] = (lat, lon)
+        words = normalize_city_name(name).split(" ")
+        for i in range(len(words)):
+            insort(self._keys, (" ".join(words[i:]), name))
+
+    def coords(self, name: str) -> tuple[float, float] | None:
+        return self._coords.get(name)
+
+    def record_hit(self, name: str) -> None:
+        """Count a weather request for `name` towards its ranking."""
+        if name in self._coords:
+            self._popularity[name] = self._popularity.get(name, 0) + 1
+
+    def top(self, limit: int) -> list[str]:
+        """Return the `limit` most popular cities."""
+        ranked = sorted(self._coords, key=lambda n: (-self._popularity.get(n, 0), n))
+        return ranked[:limit]
+
+    def search(self, prefix: str, limit: int = 5) -> list[str]:
+        """Return up to `limit` city names matching `prefix`, most popular first."""
+        key = normalize_city_name(prefix)
+        if not key:
+            return self.top(limit)
+        found: set[str] = set()
+        start = bisect_left(self._keys, (key, ""))
+        for k, name in self._keys[start:start + self.max_scan]:
+            if not k.startswith(key):
+                break
+            found.add(name)
+        return sorted(found, key=lambda n: (-self._popularity.get(n, 0), n))[:limit]
+
+
+_index: CityIndex | None = None
+
+register_store("city_index.keys", lambda: _index._keys if _index else None)
+
+
+def get_city_index() -> CityIndex:
+    """Return the process-wide city index, built on first use."""
+    global _index
+    if _index is None:
+        _index = CityIndex.from_gazetteer(popular=POPULAR_CITIES)
+    return _index
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Callable, Mapping
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from typing import Any
+
+from bot.services.weather.health import LatencyTracker
+
+"""Runtime introspection: sizes of in-process caches, event-loop lag, tracemalloc.
+
+Modules that own a growing structure register it with `register_store`, and
+components with their own counters register a `stats()`-style callable with
+`register_metrics`; the `/debug_stats` command (see `bot.handlers.debug`)
+and `debug_snapshot()` report everything registered.
+"""
+
+# Getters return the live container / metrics mapping, or None while their
+# owner does not exist yet
+_stores: dict[str, Callable[[], Any]] = {}
+_metrics: dict[str, Callable[[], Mapping[str, Any] | None]] = {}
+
+# Containers larger than this are sized from a sample of their items
+SAMPLE_ITEMS = 200
+# How deep `estimate_size` follows references from a container's items
+MAX_DEPTH = 4
+
+_SKIP = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
+
+def register_store(name: str, getter: Callable[[], Any]) -> None:
+    """Register a cache or store to report under `name`.
+
+    `getter` is called on every report and returns the container (anything
+    with `len()`), or None if it does not currently exist. Registering a
+    name again replaces the previous getter.
+    """
+    _stores[name] = getter
+
+
+def register_metrics(name: str, getter: Callable[[], Mapping[str, Any] | None]) -> None:
+    """Register a component's metrics (usually its `stats` method) under `name`."""
+    _metrics[name] = getter
+
+
+def metrics() -> dict[str, Any]:
+    """Return `{name: metrics}` for every registered component that currently exists."""
+    result = {}
+    for name, getter in sorted(_metrics.items()):
+        try:
+            values = getter()
+        except Exception as e:
+            values = {"error": repr(e)}
+        if values is not None:
+            result[name] = values
+    return result
+
+
+def _deep_size(obj: Any, seen: set[int], depth: int) -> int:
+    if id(obj) in seen or isinstance(obj, _SKIP):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+    if depth <= 0:
+        return size
+    if isinstance(obj, Mapping):
+        for key, value in obj.items():
+            size += _deep_size(key, seen, depth - 1) + _deep_size(value, seen, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += _deep_size(item, seen, depth - 1)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_size(vars(obj), seen, depth - 1)
+    elif hasattr(type(obj), "__slots__"):
+        for slot in type(obj).__slots__:
+            size += _deep_size(getattr(obj, slot, None), seen, depth - 1)
+    return size
+
+
+def estimate_size(container: Any, sample: int = SAMPLE_ITEMS, max_depth: int = MAX_DEPTH) -> int:
+    """Return the approximate number of bytes held by `container`.
+
+    Follows references up to `max_depth` levels deep, counting shared
+    objects once. For containers with more than `sample` items only the
+    first `sample` are measured and the result is extrapolated.
+    """
+    seen: set[int] = set()
+    size = sys.getsizeof(container, 0)
+    items: list = list(container.items()) if isinstance(container, Mapping) else list(container)
+    if not items:
+        return size
+    measured = items[:sample]
+    total = sum(_deep_size(item, seen, max_depth) for item in measured)
+    # the (key, value) tuples built above are not part of the container
+    if isinstance(container, Mapping):
+        total -= sum(sys.getsizeof(item, 0) for item in measured)
+    return size + total * len(items) // len(measured)
+
+
+def store_stats() -> dict[str, dict[str, int]]:
+    """Return `{name: {"entries": n, "bytes": estimate}}` for every registered store."""
+    result = {}
+    for name, getter in sorted(_stores.items()):
+        try:
+            container = getter()
+        except Exception as e:
+            result[name] = {"error": repr(e)}
+            continue
+        if container is None:
+            continue
+        result[name] = {"entries": len(container), "bytes": estimate_size(container)}
+    return result
+
+
+class LoopLagMonitor:
+    """Measure event-loop lag: how late a timer fires compared with its schedule.
+
+    A background task sleeps for `interval` seconds in a loop; the difference
+    between the scheduled and the actual wakeup is the time the loop was busy
+    running other callbacks (blocking code, long CPU work).
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 600) -> None:
+        """Create the monitor.
+
+        Args:
+            interval: Seconds between probes.
+            window: Number of recent probes kept for percentiles.
+        """
+        self.interval = float(interval)
+        self.lag = LatencyTracker(window=window)
+        self.last: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, time.monotonic() - expected)
+            self.lag.record(self.last)
+
+    async def start(self) -> None:
+        """Start probing on the running loop (no-op if already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, float | None]:
+        """Return the last, median, p95 and maximum lag (seconds) of the window."""
+        return {
+            "last": self.last,
+            "p50": self.lag.percentile(50),
+            "p95": self.lag.p95(),
+            "max": self.lag.percentile(100),
+        }
+
+
+_monitor: LoopLagMonitor | None = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Return the process-wide `LoopLagMonitor`."""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
+
+
+def start_tracemalloc(frames: int = 1) -> bool:
+    """Start tracing allocations; return False if tracing was already on.
+
+    Only allocations made after this call are traced, so take snapshots a
+    while after starting.
+    """
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def stop_tracemalloc() -> None:
+    tracemalloc.stop()
+
+
+def tracemalloc_top(limit: int = 10) -> list[str] | None:
+    """Return the `limit` source lines holding the most traced memory.
+
+    Returns None when tracing is off (see `start_tracemalloc`).
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    return [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+
+
+def debug_snapshot(top: int = 0) -> dict[str, Any]:
+    """Return store sizes, component metrics, loop lag and, if `top` > 0, tracemalloc's top lines."""
+    result: dict[str, Any] = {
+        "stores": store_stats(),
+        "metrics": metrics(),
+        "loop_lag": get_loop_monitor().stats(),
+    }
+    if top > 0:
+        result["tracemalloc"] = tracemalloc_top(top)
+    return result
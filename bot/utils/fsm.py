@@ -0,0 +1,17 @@
+from aiogram.fsm.context import FSMContext
+
+# FSM data keys that are user preferences rather than per-flow scratch data.
+PERSISTENT_KEYS = ("source",)
+
+
+async def clear_state(state: FSMContext) -> None:
+    """Reset the FSM state and flow data while keeping user preferences.
+
+    Use this instead of `state.clear()` so that e.g. the weather source chosen
+    via /choose_source survives the end of other flows.
+    """
+    data = await state.get_data()
+    kept = {k: data[k] for k in PERSISTENT_KEYS if k in data}
+    await state.clear()
+    if kept:
+        await state.set_data(kept)
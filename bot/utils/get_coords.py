@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from pathlib import Path
 
 from core.logger import logger
@@ -24,6 +25,30 @@ def get_city_coords(city_name: str, filepath: Path = DEFAULT_FILE_PATH) -> dict
         return None
 
 
+def normalize_city_name(name: str) -> str:
+    """Return the lookup key for a city name.
+
+    Whitespace is collapsed and case folded, so "london", "London " and
+    "LONDON" all map to the same key.
+    """
+    return " ".join(name.split()).casefold()
+
+
+@lru_cache(maxsize=4)
+def load_gazetteer(filepath: Path = DEFAULT_FILE_PATH) -> dict[str, tuple[str, dict]]:
+    """Return the local gazetteer indexed by normalised city name.
+
+    Values are `(canonical_name, {"lat": ..., "lon": ...})`. The file is read
+    once per path; an invalid or missing file yields an empty mapping.
+    """
+    try:
+        with open(filepath, encoding="utf-8") as f:
+            data = json.load(f).get("coords", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {normalize_city_name(name): (name, coords) for name, coords in data.items()}
+
+
 if __name__ == "__main__":
     city = "Moscow"
     coords = get_city_coords(city)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module `name`, deferring its execution until first attribute access.
+
+    Used to keep heavy dependencies (SQLAlchemy, httpx, the weather and
+    geocoding services) off the startup path: the module body runs the first
+    time a handler actually touches it. Already-imported modules are returned
+    as is.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(module: ModuleType) -> bool:
+    """Return True once a module returned by `lazy_import` has actually executed."""
+    # LazyLoader swaps the module's class back to ModuleType when it loads.
+    return type(module) is ModuleType
+
+
+__all__ = ("is_loaded", "lazy_import")
@@ -2,42 +2,145 @@ from __future__ import annotations
 
 import logging
 import sys
+import time
+from os import getenv
 from pathlib import Path
 
 from loguru import logger
 
-# Ensure logs directory exists
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-
-# Remove default handler
-logger.remove()
-
-# Console handler with custom format
-console_format = (
-    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-    "<level>{level: <8}</level> | "
-    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-    "<level>{message}</level>"
-)
-logger.add(sys.stderr, format=console_format, level="INFO")
-
-# File handlers
-logger.add(
-    str(LOG_DIR / "app.log"),
-    rotation="10 MB",
-    retention="7 days",
-    compression="zip",
-    enqueue=True,
-)
-logger.add(
-    str(LOG_DIR / "errors.log"),
-    level="ERROR",
-    rotation="10 MB",
-    retention="30 days",
-    enqueue=True,
-)
+
+# Logging profile: "dev" (coloured human-readable lines) or "prod" (JSON lines).
+LOG_PROFILE = getenv("LOG_PROFILE", "dev").strip().lower()
+LOG_LEVEL = getenv("LOG_LEVEL", "INFO").strip().upper()
+JSON_LOGS = LOG_PROFILE in ("prod", "production", "json")
+
+# Lowest level accepted by any sink; used to skip work for disabled levels.
+# Until `setup_logging()` runs, loguru's default DEBUG stderr handler is active.
+_MIN_LEVEL_NO = 0
+_configured = False
+
+
+def setup_logging() -> None:
+    """Install the application's log sinks (idempotent).
+
+    Sinks are not created at import time so that importing modules which use
+    `logger` stays cheap; the entrypoint calls this once during startup.
+    """
+    global _MIN_LEVEL_NO, _configured
+    if _configured:
+        return
+    _configured = True
+
+    # Ensure logs directory exists
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Remove default handler
+    logger.remove()
+
+    # Every record carries a correlation id; it is bound per update by
+    # `bot.middlewares.correlation.CorrelationMiddleware` and is "-" otherwise.
+    logger.configure(extra={"update_id": "-"})
+
+    if JSON_LOGS:
+        # JSON-lines output; all sinks go through loguru's background queue so
+        # serialisation and I/O never run on the event loop thread.
+        logger.add(sys.stderr, level=LOG_LEVEL, serialize=True, enqueue=True)
+    else:
+        # Console handler with custom format
+        console_format = (
+            "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+            "<level>{level: <8}</level> | "
+            "<magenta>{extra[update_id]}</magenta> | "
+            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+            "<level>{message}</level>"
+        )
+        logger.add(sys.stderr, format=console_format, level=LOG_LEVEL)
+
+    # File handlers
+    logger.add(
+        str(LOG_DIR / "app.log"),
+        level=LOG_LEVEL,
+        rotation="10 MB",
+        retention="7 days",
+        compression="zip",
+        serialize=JSON_LOGS,
+        enqueue=True,
+    )
+    logger.add(
+        str(LOG_DIR / "errors.log"),
+        level="ERROR",
+        rotation="10 MB",
+        retention="30 days",
+        serialize=JSON_LOGS,
+        enqueue=True,
+    )
+
+    _MIN_LEVEL_NO = min(logger.level(LOG_LEVEL).no, logger.level("ERROR").no)
+
+    # Replace handlers for stdlib logging
+    logging.root.handlers = [InterceptHandler()]
+    logging.basicConfig(handlers=[InterceptHandler()], level=0)
+
+    # Optionally silence noisy libraries by setting their level to WARNING and propagate to intercept
+    for name in ("asyncio", "httpx", "aiogram"):
+        logging.getLogger(name).handlers = [InterceptHandler()]
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def is_enabled(level: str) -> bool:
+    """Return True if a record at `level` would be emitted by at least one sink.
+
+    Use this to guard expensive argument preparation on hot paths; loguru
+    itself already skips message formatting for disabled levels.
+    """
+    return logger.level(level).no >= _MIN_LEVEL_NO
+
+
+class LogSampler:
+    """Rate-based sampler for repetitive hot-path log messages.
+
+    At most `burst` records per `key` are emitted within each `interval`
+    seconds. Suppressed records are counted and the count is attached to the
+    next emitted record as `extra["suppressed"]`.
+    """
+
+    def __init__(self, interval: float = 5.0, burst: int = 1) -> None:
+        self.interval = float(interval)
+        self.burst = int(burst)
+        # key -> [window_start, emitted_in_window, suppressed_since_last_emit]
+        self._state: dict[str, list[float]] = {}
+
+    def allow(self, key: str) -> tuple[bool, int]:
+        """Register an occurrence of `key`.
+
+        Returns a tuple `(emit, suppressed)` where `suppressed` is the number
+        of occurrences dropped since the previous emitted one.
+        """
+        now = time.monotonic()
+        state = self._state.get(key)
+        if state is None or now - state[0] >= self.interval:
+            suppressed = int(state[2]) if state is not None else 0
+            self._state[key] = [now, 1, 0]
+            return True, suppressed
+        if state[1] < self.burst:
+            state[1] += 1
+            suppressed, state[2] = int(state[2]), 0
+            return True, suppressed
+        state[2] += 1
+        return False, 0
+
+    def log(self, key: str, level: str, message: str, *args, **kwargs) -> None:
+        """Log `message` at `level` unless sampled out for `key`."""
+        if not is_enabled(level):
+            return
+        emit, suppressed = self.allow(key)
+        if not emit:
+            return
+        if suppressed:
+            message += " (+{suppressed} suppressed)"
+            kwargs["suppressed"] = suppressed
+        logger.opt(depth=1).bind(sampled=key).log(level, message, *args, **kwargs)
 
 
 class InterceptHandler(logging.Handler):
@@ -57,14 +160,4 @@ class InterceptHandler(logging.Handler):
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
 
-# Replace handlers for stdlib logging
-logging.root.handlers = [InterceptHandler()]
-logging.basicConfig(handlers=[InterceptHandler()], level=0)
-
-# Optionally silence noisy libraries by setting their level to WARNING and propagate to intercept
-for name in ("asyncio", "httpx", "aiogram"):
-    logging.getLogger(name).handlers = [InterceptHandler()]
-    logging.getLogger(name).setLevel(logging.WARNING)
-
-
-__all__ = ("logger", "InterceptHandler")
+__all__ = ("logger", "InterceptHandler", "LogSampler", "is_enabled", "setup_logging", "JSON_LOGS")
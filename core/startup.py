@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import importlib
+import time
+from contextlib import contextmanager
+from os import getenv
+from types import ModuleType
+
+from core.logger import logger
+
+
+class StartupProfiler:
+    """Record how long each import and initialisation step takes at startup.
+
+    Enabled with `STARTUP_PROFILE=1`. When disabled, `step` and
+    `import_module` add no measurable overhead and `report` logs nothing.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.steps: list[tuple[str, float]] = []
+
+    @classmethod
+    def from_env(cls) -> StartupProfiler:
+        return cls(enabled=getenv("STARTUP_PROFILE", "").strip().lower() in ("1", "true", "yes"))
+
+    @contextmanager
+    def step(self, name: str):
+        """Time the enclosed block and record it under `name`."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+    def import_module(self, name: str) -> ModuleType:
+        """Import `name` (including whatever it imports eagerly) as a timed step."""
+        with self.step(f"import {name}"):
+            return importlib.import_module(name)
+
+    def report(self) -> None:
+        """Log every recorded step and the total time since the profiler was created."""
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.started
+        lines = [f"{dt * 1000:9.1f} ms  {name}" for name, dt in self.steps]
+        logger.info("Startup profile ({:.1f} ms total):\n{}", total * 1000, "\n".join(lines))
+
+
+__all__ = ("StartupProfiler",)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+
+from bot.services.geocoding.geocoder import GeocodingBackend, GeocodingError, Place
+from bot.services.weather.models import HourlyForecast, WeatherReport
+from bot.services.weather.providers import ProviderBusy, ProviderError, WeatherProvider
+
+"""Local stand-ins for the upstream APIs: slow, failing or healthy on demand."""
+
+
+class FakeProvider(WeatherProvider):
+    """Weather provider answering after `delay` seconds, or failing while `down`.
+
+    `down=True` raises a transient `ProviderError` (an outage) and `busy=True`
+    a `ProviderBusy` (the local limiter turned the call away); `calls` counts
+    fetch attempts, `cancelled` the ones abandoned by the router.
+    """
+
+    kinds = frozenset({"current", "hourly"})
+
+    def __init__(
+        self, name: str, delay: float = 0.0, down: bool = False, busy: bool = False, temperature: float = 10.0
+    ) -> None:
+        self.name = name
+        self.title = name.title()
+        self.delay = delay
+        self.down = down
+        self.busy = busy
+        self.temperature = temperature
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _wait(self) -> None:
+        if self.busy:
+            raise ProviderBusy(self.name, "upstream queue is full")
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.down:
+            raise ProviderError(self.name, "simulated outage")
+
+    async def fetch_current(self, lat: float, lon: float) -> WeatherReport:
+        await self._wait()
+        return WeatherReport(
+            temperature=self.temperature,
+            windspeed=1.0,
+            winddirection=180.0,
+            weathercode=0,
+            time="2026-10-19T12:00",
+            source=self.name,
+        )
+
+    async def fetch_hourly(self, lat: float, lon: float) -> HourlyForecast:
+        await self._wait()
+        return HourlyForecast(
+            times=[f"2026-10-19T{h:02d}:00" for h in range(24)],
+            temperatures=[self.temperature + h / 10 for h in range(24)],
+            run="2026101912",
+            source=self.name,
+        )
+
+
+class FakeGeocoder(GeocodingBackend):
+    """Geocoding backend serving `places` (normalised name -> Place)."""
+
+    def __init__(self, places: dict[str, Place] | None = None, delay: float = 0.0, down: bool = False) -> None:
+        self.places = places or {}
+        self.delay = delay
+        self.down = down
+        self.calls = 0
+
+    async def search(self, name: str) -> Place | None:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise GeocodingError("simulated outage")
+        return self.places.get(name.lower())
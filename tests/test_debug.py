@@ -0,0 +1,6 @@
+from bot.handlers.debug import _parse_admin_ids
+
+
+def test_admin_ids_skip_invalid_entries():
+    assert _parse_admin_ids("") == frozenset()
+    assert _parse_admin_ids(" 123, abc,,456 ,1.5") == {123, 456}
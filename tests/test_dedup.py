@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import Update
+from sqlalchemy import create_engine
+
+from bot.database import base as db
+from bot.database.update_mark import load_update_mark, save_update_mark
+from bot.middlewares import dedup
+from bot.middlewares.dedup import MARK_MAX_AGE, DedupMiddleware, RecentIds
+
+
+def feed(middleware, *update_ids):
+    """Pass updates through `middleware`; return the ids that reached the handler."""
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event.update_id)
+
+    async def main():
+        for update_id in update_ids:
+            await middleware(handler, Update(update_id=update_id), {})
+
+    asyncio.run(main())
+    return handled
+
+
+def started(monkeypatch, stored, capacity=10):
+    """Return a persisting middleware whose startup loaded `stored` as bot 42's mark."""
+    loaded = []
+
+    def load(bot_id):
+        loaded.append(bot_id)
+        return stored
+
+    monkeypatch.setattr(dedup, "load_update_mark", load)
+    # keep background flushes away from the real database
+    monkeypatch.setattr(dedup, "save_update_mark", lambda bot_id, update_id: None)
+    middleware = DedupMiddleware(capacity=capacity, persist=True)
+    asyncio.run(middleware.startup(SimpleNamespace(id=42)))
+    assert loaded == [42]
+    return middleware
+
+
+def test_recent_ids_evicts_the_oldest_at_capacity():
+    recent = RecentIds(3)
+    assert all(recent.add(i) for i in (1, 2, 3))
+    assert not recent.add(2)
+    assert recent.add(4)
+
+    assert len(recent) == 3
+    assert 1 not in recent
+    assert sorted(recent) == [2, 3, 4]
+
+
+def test_recent_ids_needs_a_positive_capacity():
+    with pytest.raises(ValueError):
+        RecentIds(0)
+
+
+def test_redelivered_updates_are_dropped():
+    middleware = DedupMiddleware(capacity=10)
+
+    assert feed(middleware, 1, 2, 1, 3, 2) == [1, 2, 3]
+    assert middleware.dropped == 2
+    assert middleware.mark == 3
+
+
+def test_window_below_the_persisted_mark_is_dropped_after_startup(monkeypatch):
+    middleware = started(monkeypatch, (100, time.time()))
+
+    assert middleware.floor == 100
+    # (floor - capacity, floor] was processed before the restart
+    assert feed(middleware, 91, 95, 100, 101) == [101]
+    assert middleware.dropped == 3
+
+
+def test_id_far_below_the_mark_starts_a_new_sequence(monkeypatch):
+    middleware = started(monkeypatch, (1000, time.time()))
+
+    assert feed(middleware, 5, 6, 995) == [5, 6, 995]
+    assert middleware.floor == 0
+    assert middleware.mark == 995
+
+
+def test_stale_mark_is_ignored(monkeypatch):
+    middleware = started(monkeypatch, (100, time.time() - MARK_MAX_AGE - 60))
+
+    assert middleware.floor == middleware.mark == 0
+    assert feed(middleware, 95, 100) == [95, 100]
+
+
+def test_update_marks_round_trip_per_bot(tmp_path):
+    path = tmp_path / "bot.db"
+    assert load_update_mark(1, path) is None
+
+    engine = create_engine(f"sqlite:///{path}")
+    db.Base.metadata.create_all(engine)
+    engine.dispose()
+
+    save_update_mark(1, 500, path)
+    save_update_mark(2, 70, path)
+    # a new, lower sequence replaces the old mark
+    save_update_mark(1, 12, path)
+
+    (update_id, updated_at), (other_id, _) = load_update_mark(1, path), load_update_mark(2, path)
+    assert (update_id, other_id) == (12, 70)
+    assert time.time() - updated_at < 5
+    assert load_update_mark(3, path) is None
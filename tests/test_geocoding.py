@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot.database import base as db
+from bot.services.geocoding.geocoder import GeocodingError, GeocodingService, OpenMeteoGeocoder, Place
+from bot.services.weather.limiter import AdaptiveLimiter
+from tests.fakes import FakeGeocoder
+
+ZELL = Place(name="Zell am See", lat=47.32, lon=12.8, country="Austria")
+
+
+def run_with_service(backend, scenario, create_tables=True):
+    """Run `scenario(service)` against a service backed by an in-memory cache database."""
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        if create_tables:
+            async with engine.begin() as conn:
+                await conn.run_sync(db.Base.metadata.create_all)
+        service = GeocodingService(backend=backend, session_pool=async_sessionmaker(engine, expire_on_commit=False))
+        try:
+            return await scenario(service)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_gazetteer_hit_skips_the_backend():
+    backend = FakeGeocoder()
+
+    place = run_with_service(backend, lambda service: service.resolve("  LONDON "))
+
+    assert place.name == "London"
+    assert backend.calls == 0
+
+
+def test_found_and_missing_places_are_cached():
+    backend = FakeGeocoder({"zell am see": ZELL})
+
+    async def scenario(service):
+        results = [await service.resolve(name) for name in ("Zell am See", "zell  AM see", "Atlantis", "ATLANTIS")]
+        backend.down = True
+        results.append(await service.resolve("Zell am See"))
+        return results
+
+    zell, zell_again, missing, missing_again, cached = run_with_service(backend, scenario)
+
+    assert zell == zell_again == cached == ZELL
+    assert missing is None and missing_again is None
+    assert backend.calls == 2
+
+
+def test_upstream_failure_raises_and_is_not_cached():
+    backend = FakeGeocoder({"zell am see": ZELL}, down=True)
+
+    async def scenario(service):
+        with pytest.raises(GeocodingError):
+            await service.resolve("Zell am See")
+        backend.down = False
+        return await service.resolve("Zell am See")
+
+    assert run_with_service(backend, scenario) == ZELL
+    assert backend.calls == 2
+
+
+def test_concurrent_lookups_share_one_upstream_call():
+    backend = FakeGeocoder({"zell am see": ZELL}, delay=0.05)
+
+    async def scenario(service):
+        return await asyncio.gather(*(service.resolve(name) for name in ("Zell am See", "zell am see", " ZELL AM SEE")))
+
+    assert run_with_service(backend, scenario) == [ZELL] * 3
+    assert backend.calls == 1
+
+
+def test_broken_cache_falls_back_to_the_upstream():
+    backend = FakeGeocoder({"zell am see": ZELL})
+
+    async def scenario(service):
+        return [await service.resolve("Zell am See") for _ in range(2)]
+
+    # no geocode_cache table: reads miss and writes fail, the places still arrive
+    assert run_with_service(backend, scenario, create_tables=False) == [ZELL, ZELL]
+    assert backend.calls == 2
+
+
+def test_unexpected_errors_are_not_reported_as_not_found():
+    backend = FakeGeocoder()
+
+    async def scenario(service):
+        async def broken(name):
+            raise RuntimeError("bug")
+
+        backend.search = broken
+        with pytest.raises(GeocodingError):
+            await service.resolve("Zell am See")
+
+    run_with_service(backend, scenario)
+
+
+def test_upstream_retry_after_pauses_the_shared_limiter():
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, headers={"Retry-After": "30"}))
+    limiter = AdaptiveLimiter(initial_limit=4)
+    backend = OpenMeteoGeocoder(client=httpx.AsyncClient(transport=transport), limiter=limiter)
+
+    async def scenario():
+        with pytest.raises(GeocodingError):
+            await backend.search("Zell am See")
+        # the pause outlasts the queue deadline: rejected without a request
+        with pytest.raises(GeocodingError, match="retry after"):
+            await backend.search("Zell am See")
+        await backend.close()
+
+    asyncio.run(scenario())
+    assert limiter.stats()["blocked_for"] > 25
+    assert (limiter.limit, limiter.overloads, limiter.rejected) == (2, 1, 1)
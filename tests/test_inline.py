@@ -0,0 +1,35 @@
+import asyncio
+
+from aiogram.types import InlineQuery, User
+
+from bot.handlers import inline
+from bot.services.weather.get_data import WeatherService
+from tests.fakes import FakeProvider
+
+
+def test_handler_returns_before_the_answer_waits_for_weather(monkeypatch):
+    service = WeatherService(providers=[FakeProvider("alpha", delay=0.2)], hedge=False)
+    monkeypatch.setattr(inline.weather, "get_weather_service", lambda: service)
+    answers = []
+
+    async def answer(self, results, **kwargs):
+        answers.append((self.query, results, kwargs["cache_time"]))
+
+    monkeypatch.setattr(InlineQuery, "answer", answer)
+    query = InlineQuery(id="1", from_user=User(id=7, is_bot=False, first_name="T"), query="Lond", offset="")
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await inline.inline_city_search(query)
+        returned = loop.time() - started
+        await asyncio.gather(*inline._background)
+        return returned
+
+    # the chat lock is only held while the handler runs
+    assert asyncio.run(scenario()) < 0.05
+    [(text, results, cache_time)] = answers
+    assert text == "Lond"
+    assert results[0].title == "London"
+    assert "alpha" in results[0].input_message_content.message_text
+    assert cache_time == inline.CACHE_TIME_FULL
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from bot.services.weather.limiter import AdaptiveLimiter, LimiterTimeout, parse_retry_after
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_overload_halves_the_limit_and_success_grows_it_back():
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=2)
+
+    async def scenario():
+        for expected in (4, 2, 2):
+            await limiter.acquire()
+            limiter.release(overloaded=True)
+            assert limiter.limit == expected
+        for _ in range(10):
+            await limiter.acquire()
+            limiter.release(latency=0.01)
+
+    run(scenario())
+    assert limiter.limit > 2
+    assert limiter.overloads == 3
+
+
+def test_retry_after_pauses_new_calls_until_the_timer_wakes_them():
+    limiter = AdaptiveLimiter()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        await limiter.acquire()
+        limiter.release(retry_after=0.1)
+        started = loop.time()
+        await limiter.acquire(timeout=1.0)
+        return loop.time() - started
+
+    # no release happens during the pause: only the timer can wake the waiter
+    assert 0.08 < run(scenario()) < 0.5
+    assert limiter.in_flight == 1
+
+
+def test_pause_longer_than_the_deadline_is_rejected_at_once():
+    limiter = AdaptiveLimiter()
+
+    async def scenario():
+        await limiter.acquire()
+        limiter.release(retry_after=30)
+        with pytest.raises(LimiterTimeout, match="retry after"):
+            await limiter.acquire(timeout=1.0)
+
+    run(scenario())
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 0
+
+
+def test_waiter_gives_up_when_its_deadline_passes():
+    limiter = AdaptiveLimiter(initial_limit=1)
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(LimiterTimeout, match="timed out"):
+            await limiter.acquire(timeout=0.02)
+        assert limiter.queue_depth == 0
+
+    run(scenario())
+    assert limiter.timeouts == 1
+
+
+def test_full_queue_rejects_new_callers():
+    limiter = AdaptiveLimiter(initial_limit=1, max_queue=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LimiterTimeout, match="queue is full"):
+            await limiter.acquire()
+        limiter.release(latency=0.01)
+        await waiter
+
+    run(scenario())
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 1
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    limiter = AdaptiveLimiter(initial_limit=1)
+
+    async def scenario():
+        await limiter.acquire()
+        first = asyncio.ensure_future(limiter.acquire())
+        second = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        # hand the slot to `first`, then cancel it before it resumes
+        limiter.release(latency=0.01)
+        first.cancel()
+        await asyncio.wait_for(second, timeout=1.0)
+        assert first.cancelled()
+
+    run(scenario())
+    assert limiter.in_flight == 1
+    assert limiter.queue_depth == 0
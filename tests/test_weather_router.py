@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import pytest
+
+from bot.services.weather.get_data import WeatherService
+from bot.services.weather.providers import ProviderBusy, ProviderError
+from bot.services.weather.router import ProviderRouter
+from tests.fakes import FakeProvider
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_preferred_source_is_used_while_healthy():
+    a, b = FakeProvider("alpha"), FakeProvider("beta")
+    router = ProviderRouter([a, b], hedge=False)
+
+    assert run(router.fetch(1, 2, preferred="beta")).source == "beta"
+    assert run(router.fetch(1, 2, preferred="Alpha")).source == "alpha"
+    assert (a.calls, b.calls) == (1, 1)
+
+
+def test_fails_over_when_preferred_provider_is_down():
+    a, b = FakeProvider("alpha", down=True), FakeProvider("beta")
+    router = ProviderRouter([a, b], hedge=False)
+
+    assert run(router.fetch(1, 2, preferred="alpha")).source == "beta"
+    assert a.calls == 1
+
+
+def test_raises_when_every_provider_fails():
+    router = ProviderRouter([FakeProvider("alpha", down=True), FakeProvider("beta", down=True)], hedge=False)
+
+    with pytest.raises(ProviderError):
+        run(router.fetch(1, 2))
+
+
+def test_back_pressure_is_reported_apart_from_failures():
+    busy, down = FakeProvider("busy", busy=True), FakeProvider("down", down=True)
+
+    with pytest.raises(ProviderBusy):
+        run(ProviderRouter([busy], hedge=False).fetch(1, 2))
+    with pytest.raises(ProviderError) as failed:
+        run(ProviderRouter([busy, down], hedge=False).fetch(1, 2))
+    assert not isinstance(failed.value, ProviderBusy)
+    assert failed.value.transient
+
+    # back-pressure does not count against the breaker
+    router = ProviderRouter([busy], hedge=False, failure_threshold=1)
+    for _ in range(2):
+        with pytest.raises(ProviderBusy):
+            run(router.fetch(1, 2))
+    assert router.breakers["busy"].state == "closed"
+
+
+def test_slow_request_is_hedged_to_the_next_provider():
+    slow, fast = FakeProvider("slow", delay=1.0), FakeProvider("fast", delay=0.01)
+    router = ProviderRouter([slow, fast], hedge_min_delay=0.01, hedge_max_delay=0.05)
+
+    started = time.monotonic()
+    report = run(router.fetch(1, 2, preferred="slow"))
+
+    assert report.source == "fast"
+    assert time.monotonic() - started < 0.5
+    assert slow.cancelled == 1
+
+
+def test_no_hedging_when_disabled():
+    slow, fast = FakeProvider("slow", delay=0.1), FakeProvider("fast")
+    router = ProviderRouter([slow, fast], hedge=False, hedge_max_delay=0.01)
+
+    assert run(router.fetch(1, 2, preferred="slow")).source == "slow"
+    assert fast.calls == 0
+
+
+def test_breaker_opens_then_probes_half_open():
+    a, b = FakeProvider("alpha", down=True), FakeProvider("beta")
+    router = ProviderRouter([a, b], hedge=False, failure_threshold=2, reset_timeout=0.05)
+
+    for _ in range(2):
+        run(router.fetch(1, 2, preferred="alpha"))
+    assert router.breakers["alpha"].state == "open"
+
+    # open: alpha is skipped entirely
+    run(router.fetch(1, 2, preferred="alpha"))
+    assert a.calls == 2
+
+    time.sleep(0.06)
+    assert router.breakers["alpha"].state == "half-open"
+    a.down = False
+    assert run(router.fetch(1, 2, preferred="alpha")).source == "alpha"
+    assert router.breakers["alpha"].state == "closed"
+
+
+def test_unpreferred_requests_go_to_the_fastest_provider():
+    slow, fast = FakeProvider("slow", delay=0.03), FakeProvider("fast")
+    router = ProviderRouter([slow, fast], hedge=False)
+    run(router.fetch(1, 2, preferred="slow"))
+    run(router.fetch(1, 2, preferred="fast"))
+
+    assert [p.name for p in router.candidates()] == ["fast", "slow"]
+    assert [p.name for p in router.candidates("slow")] == ["slow", "fast"]
+
+
+def test_service_caches_per_preferred_source():
+    a, b = FakeProvider("alpha"), FakeProvider("beta")
+    service = WeatherService(providers=[a, b], hedge=False)
+
+    async def scenario():
+        first = await service.get_weather(1, 1, source="alpha")
+        second = await service.get_weather(1, 1, source="beta")
+        again = await service.get_weather(1, 1, source="alpha")
+        return first, second, again
+
+    first, second, again = run(scenario())
+    assert (first.source, second.source, again.source) == ("alpha", "beta", "alpha")
+    assert (a.calls, b.calls) == (1, 1)
+
+
+def test_service_returns_none_during_outage():
+    service = WeatherService(providers=[FakeProvider("alpha", down=True)], hedge=False)
+
+    assert run(service.get_weather(1, 1)) is None
+    assert run(service.get_hourly(1, 1)) is None
+
+
+def test_service_does_not_cache_back_pressure():
+    provider = FakeProvider("alpha", busy=True)
+    service = WeatherService(providers=[provider], hedge=False)
+
+    assert run(service.get_weather(1, 1)) is None
+    assert run(service.get_hourly(1, 1)) is None
+    provider.busy = False
+    assert run(service.get_weather(1, 1)).source == "alpha"
+    assert run(service.get_hourly(1, 1)).source == "alpha"
+
+
+def test_concurrent_requests_share_one_fetch_even_if_the_first_is_cancelled():
+    provider = FakeProvider("alpha", delay=0.05)
+    service = WeatherService(providers=[provider], hedge=False)
+
+    async def scenario():
+        leader = asyncio.ensure_future(service.get_weather(2, 2))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(service.get_weather(2, 2))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert run(scenario()).source == "alpha"
+    assert provider.calls == 1